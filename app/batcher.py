@@ -0,0 +1,105 @@
+"""
+Agrupación dinámica de predicciones individuales.
+
+Las peticiones concurrentes a /predecir se encolan y una tarea de fondo las
+agrupa (hasta predict_batch_max filas o predict_batch_wait_ms de espera) en
+una sola evaluación del modelo, cuyo costo es casi todo fijo por llamada.
+"""
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .model import predecir_varios
+
+logger = logging.getLogger(__name__)
+
+_cola: Optional[asyncio.Queue] = None
+_tarea: Optional[asyncio.Task] = None
+
+
+async def _agrupar(cola: asyncio.Queue) -> List[Tuple[Tuple[float, float, int], asyncio.Future]]:
+    """Espera la primera petición y junta las que lleguen dentro de la ventana"""
+    grupo = [await cola.get()]
+    loop = asyncio.get_running_loop()
+    limite = loop.time() + settings.predict_batch_wait_ms / 1000
+
+    while len(grupo) < settings.predict_batch_max:
+        # Primero lo que ya está encolado, sin ceder el loop
+        try:
+            grupo.append(cola.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+
+        restante = limite - loop.time()
+        if restante <= 0:
+            break
+        try:
+            grupo.append(await asyncio.wait_for(cola.get(), restante))
+        except asyncio.TimeoutError:
+            break
+
+    return grupo
+
+
+async def _procesar(cola: asyncio.Queue, executor: Executor):
+    """Tarea de fondo: predice cada grupo en el executor y resuelve los futures"""
+    loop = asyncio.get_running_loop()
+    while True:
+        grupo = await _agrupar(cola)
+        filas, futuros = zip(*grupo)
+        X = np.empty((len(filas), 3), dtype=np.float32)
+        for j, columna in enumerate(zip(*filas)):
+            X[:, j] = columna
+
+        try:
+            resultados = await loop.run_in_executor(executor, predecir_varios, X)
+        except Exception as e:
+            logger.error(f"Error en predicción agrupada ({len(grupo)} filas): {e}")
+            for futuro in futuros:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            continue
+
+        for futuro, resultado in zip(futuros, resultados):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+
+def iniciar_batcher(executor: Executor):
+    """Crea la cola y arranca la tarea de fondo (llamar desde el lifespan)"""
+    global _cola, _tarea
+    _cola = asyncio.Queue()
+    _tarea = asyncio.create_task(_procesar(_cola, executor))
+
+
+def detener_batcher():
+    """Cancela la tarea de fondo"""
+    global _cola, _tarea
+    if _tarea is not None:
+        _tarea.cancel()
+    _cola = None
+    _tarea = None
+
+
+async def predecir_agrupado(
+    dias_transcurridos: float,
+    dias_umbral: float,
+    id_rol: int
+) -> Tuple[float, str, Tuple[str, ...]]:
+    """
+    Predicción individual resuelta dentro del siguiente grupo.
+
+    Returns:
+        Tupla (probabilidad, nivel_riesgo, factores), igual que model.predecir
+    """
+    if _cola is None:
+        raise RuntimeError("Batcher de predicciones no iniciado")
+
+    futuro = asyncio.get_running_loop().create_future()
+    await _cola.put(((dias_transcurridos, dias_umbral, id_rol), futuro))
+    return await futuro
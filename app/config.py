@@ -2,13 +2,18 @@
 Configuración del microservicio de predicción
 """
 import os
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Configuración de la aplicación"""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        protected_namespaces=()  # Permite usar campos con prefijo "model_"
+    )
+    
     # Base de datos - Proyecto1SLA_DB
     # Usar autenticación SQL Server (la autenticación de Windows no funciona desde contenedores Linux)
     database_server: str = "host.docker.internal\\MSSQLSERVER1"
@@ -21,13 +26,27 @@ class Settings(BaseSettings):
         """Construye la URL de conexión dinámicamente"""
         return f"mssql+pyodbc://{self.database_user}:{self.database_password}@{self.database_server}/{self.database_name}?driver=ODBC+Driver+18+for+SQL+Server&TrustServerCertificate=yes"
     
+    # Pool de conexiones
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_timeout: int = 10  # segundos esperando una conexión libre
+    db_pool_recycle: int = 3600  # segundos (1 hora)
+    db_query_cache_size: int = 1200  # SQL compilado que SQLAlchemy mantiene en caché
+    
     # Modelo
     model_path: str = "/app/models/sla_model.pkl"
     model_reload_interval: int = 3600  # segundos (1 hora)
+    model_check_interval: int = 10  # segundos entre chequeos del .npz guardado por otro worker
     max_training_samples: int = 10000
+    predict_batch_max: int = 64  # predicciones individuales agrupadas por llamada al modelo
+    predict_batch_wait_ms: float = 2.0  # espera máxima para completar un grupo
     
     # Caché
     cache_ttl: int = 600  # 10 minutos
+    page_cache_ttl: int = 60  # primera página de solicitudes (dashboards con auto-refresh)
+    count_cache_ttl: int = 60  # COUNT(*) de total_paginas en /predecir/paginado
+    cache_ttl_health: int = 5  # segundos que se reutiliza un chequeo de BD exitoso
+    response_cache_ttl: int = 300  # respuestas serializadas de /tendencias
     
     # Logging
     log_level: str = "INFO"
@@ -35,14 +54,13 @@ class Settings(BaseSettings):
     # Servidor
     host: str = "0.0.0.0"
     port: int = 8000
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
-        protected_namespaces = ()  # Permite usar campos con prefijo "model_"
+    threadpool_size: int = 64  # hilos para endpoints síncronos
+
+
+# Instancia única: se lee el entorno una sola vez al importar el módulo
+settings: Settings = Settings()
 
 
-@lru_cache()
 def get_settings() -> Settings:
-    """Obtiene la configuración (cacheada)"""
-    return Settings()
+    """Obtiene la configuración (compatibilidad con código que aún la pide por función)"""
+    return settings
@@ -8,32 +8,77 @@ Tablas utilizadas:
 - rol_registro: Roles/puestos de trabajo
 """
 import os
+import threading
+import time
+import anyio
+import numpy as np
+import pandas as pd
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from typing import List, Dict, Tuple, Optional
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.orm import Session, sessionmaker
+from typing import List, Dict, Iterator, Mapping, Sequence, Tuple, Optional
 from contextlib import contextmanager
+from contextvars import ContextVar
+from cachetools import TTLCache, cached
 import logging
 
-from .config import get_settings
+from .config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 # Crear engine con pool de conexiones
 engine = create_engine(
     settings.database_url,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
     pool_pre_ping=True,  # Verificar conexión antes de usar
-    pool_recycle=3600    # Reciclar conexiones cada hora
+    pool_recycle=settings.db_pool_recycle,  # Reciclar conexiones periódicamente
+    pool_use_lifo=True,  # Reusar las conexiones más recientes (las demás expiran solas)
+    query_cache_size=settings.db_query_cache_size,
+    fast_executemany=True  # executemany de pyodbc en un solo envío
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Sesión del request HTTP en curso (la abre y cierra la dependencia de main.py)
+_request_session: ContextVar[Optional[Session]] = ContextVar("_request_session", default=None)
+
+
+async def request_db_session():
+    """
+    Dependencia de FastAPI: abre una sesión compartida por todos los helpers
+    de BD de un request, así un endpoint que llama varias funciones usa una
+    sola conexión del pool.
+    
+    Crear la sesión no toca la BD (la conexión se pide en el primer uso);
+    cerrarla sí (ROLLBACK y devolución al pool), por eso el cierre corre en
+    un thread y no bloquea el event loop.
+    """
+    session = SessionLocal()
+    _request_session.set(session)
+    try:
+        yield
+    finally:
+        _request_session.set(None)
+        await anyio.to_thread.run_sync(session.close)
+
+
 @contextmanager
 def get_db_session():
-    """Context manager para sesiones de BD"""
+    """Context manager para sesiones de BD (reutiliza la del request si existe)"""
+    session = _request_session.get()
+    if session is not None:
+        try:
+            yield session
+        finally:
+            # Los helpers atrapan sus errores; si alguno dejó la transacción
+            # inválida, se limpia para que el siguiente helper pueda usarla
+            if not session.is_active:
+                session.rollback()
+        return
+    
     session = SessionLocal()
     try:
         yield session
@@ -41,177 +86,620 @@ def get_db_session():
         session.close()
 
 
+# =============================================================================
+# QUERIES PRECOMPILADAS
+# =============================================================================
+# Las variantes de cada query se construyen una sola vez al importar el módulo,
+# así text() no vuelve a parsear los parámetros en cada request.
+
+# Estados que se excluyen cuando no se piden solicitudes históricas
+_ESTADOS_CERRADOS = ("COMPLETADA", "CANCELADA")
+
+# Columnas de solicitud: id_solicitud, fecha_solicitud, estado_solicitud, 
+#                        estado_cumplimiento_sla, id_sla, id_rol_registro, num_dias_sla
+# Columnas de config_sla: id_sla, codigo_sla, dias_umbral, tipo_solicitud
+# Columnas de rol_registro: id_rol_registro, nombre_rol, bloque_tech
+_SOLICITUD_COLUMNAS = """
+    s.id_solicitud as id_solicitud,
+    s.fecha_solicitud as fecha_solicitud,
+    x.dias as dias_transcurridos,
+    c.dias_umbral as dias_umbral,
+    s.id_rol_registro as id_rol,
+    c.codigo_sla as codigo_sla,
+    r.nombre_rol as nombre_rol,
+    r.bloque_tech as bloque_tech,
+    c.dias_umbral - x.dias as dias_restantes,
+    s.estado_solicitud as estado_solicitud,
+    s.estado_cumplimiento_sla as estado_cumplimiento
+"""
+
+# CROSS APPLY calcula DATEDIFF una sola vez por fila; las columnas, el filtro
+# de críticas y el seek reutilizan x.dias en lugar de repetir la expresión
+_SOLICITUD_FROM = """
+    FROM solicitud s
+    INNER JOIN config_sla c ON s.id_sla = c.id_sla
+    INNER JOIN rol_registro r ON s.id_rol_registro = r.id_rol_registro
+    CROSS APPLY (SELECT DATEDIFF(day, s.fecha_solicitud, GETDATE()) AS dias) x
+    WHERE c.es_activo = 1
+        AND s.estado_cumplimiento_sla LIKE 'EN_PROCESO_%'
+"""
+
+# Seek de keyset del ordenamiento por fecha (páginas de un SLA). El orden por
+# urgencia no tiene seek: dias_restantes se calcula con GETDATE(), ningún
+# índice lo sirve y su valor cambia a medianoche, así que ese modo pagina
+# con OFFSET.
+_SEEK_POR_FECHA = """
+    AND (s.fecha_solicitud < :last_fecha
+         OR (s.fecha_solicitud = :last_fecha AND s.id_solicitud < :last_id))
+"""
+
+# fecha_solicitud tal como la guarda SQL Server (estilo 121, sea date, datetime
+# o datetime2) para el cursor: al enlazarla como texto se convierte al tipo de
+# la columna sin pérdida. Un datetime de Python se enviaría como datetime2 y,
+# contra una columna datetime (redondeo a 1/300 s), la igualdad del desempate
+# no encontraría las filas con la misma fecha.
+_FECHA_CURSOR = """,
+    CONVERT(varchar(27), s.fecha_solicitud, 121) as fecha_cursor
+"""
+
+# Modos de paginación: primera página, seek por cursor u OFFSET
+_MODOS_PAGINA = ("inicio", "seek", "offset")
+
+
+def _filtros_sql(incluir_historicas: bool, con_sla: bool) -> str:
+    """
+    Condiciones opcionales de estado y SLA como parámetros enlazados.
+    
+    El texto SQL solo depende de qué filtros están presentes, no de sus valores,
+    así SQL Server reutiliza el mismo plan para todos los códigos SLA.
+    """
+    condiciones = ""
+    if not incluir_historicas:
+        condiciones += " AND s.estado_solicitud NOT IN (:estado_1, :estado_2)"
+    if con_sla:
+        condiciones += " AND c.codigo_sla = :codigo_sla"
+    return condiciones
+
+
+def _filtros_params(incluir_historicas: bool, codigo_sla: Optional[str]) -> Dict:
+    """Valores de los parámetros usados por _filtros_sql"""
+    params = {}
+    if not incluir_historicas:
+        params["estado_1"], params["estado_2"] = _ESTADOS_CERRADOS
+    if codigo_sla:
+        params["codigo_sla"] = codigo_sla
+    return params
+
+
+def _build_query_criticas(incluir_historicas: bool, con_sla: bool) -> TextClause:
+    """Solicitudes que han consumido 70%+ del tiempo, más antiguas primero"""
+    return text(f"""
+        SELECT {_SOLICITUD_COLUMNAS}
+        {_SOLICITUD_FROM}
+            {_filtros_sql(incluir_historicas, con_sla)}
+            AND x.dias >= (c.dias_umbral * 0.7)
+        ORDER BY dias_transcurridos DESC
+        OFFSET 0 ROWS FETCH NEXT :limite ROWS ONLY
+    """)
+
+
+def _build_query_limitada(incluir_historicas: bool, con_sla: bool) -> TextClause:
+    """
+    N registros con distribución equilibrada por SLA.
+    
+    Usa ROW_NUMBER() OVER (PARTITION BY codigo_sla) para obtener
+    una muestra representativa de cada SLA
+    """
+    return text(f"""
+        WITH RankedSolicitudes AS (
+            SELECT 
+                s.id_solicitud as id_solicitud,
+                x.dias as dias_transcurridos,
+                c.dias_umbral as dias_umbral,
+                s.id_rol_registro as id_rol,
+                c.codigo_sla as codigo_sla,
+                r.nombre_rol as nombre_rol,
+                r.bloque_tech as bloque_tech,
+                c.dias_umbral - x.dias as dias_restantes,
+                s.estado_solicitud as estado_solicitud,
+                s.estado_cumplimiento_sla as estado_cumplimiento,
+                ROW_NUMBER() OVER (
+                    PARTITION BY c.codigo_sla 
+                    ORDER BY (c.dias_umbral - x.dias) ASC
+                ) as rn
+            {_SOLICITUD_FROM}
+                {_filtros_sql(incluir_historicas, con_sla)}
+        )
+        SELECT 
+            id_solicitud, dias_transcurridos, dias_umbral, id_rol,
+            codigo_sla, nombre_rol, bloque_tech, dias_restantes,
+            estado_solicitud, estado_cumplimiento
+        FROM RankedSolicitudes
+        ORDER BY rn, codigo_sla
+        OFFSET 0 ROWS FETCH NEXT :limite ROWS ONLY
+    """)
+
+
+def _build_query_pagina(incluir_historicas: bool, con_sla: bool, modo: str) -> TextClause:
+    """
+    Página de solicitudes.
+    
+    Si hay filtro de SLA, ordena por fecha y pagina por keyset (índice
+    fecha_solicitud, id_solicitud). Si no hay filtro, ordena por días
+    restantes (más urgentes primero), lo que muestra una mezcla de todos los
+    SLAs según urgencia; ese orden solo admite modo "inicio" u "offset".
+    """
+    if con_sla:
+        seek = _SEEK_POR_FECHA
+        order_by = "ORDER BY s.fecha_solicitud DESC, s.id_solicitud DESC"
+        columnas = _SOLICITUD_COLUMNAS + _FECHA_CURSOR
+    else:
+        seek = ""
+        order_by = "ORDER BY dias_restantes ASC, s.id_solicitud ASC"
+        columnas = _SOLICITUD_COLUMNAS
+    
+    offset = "OFFSET :offset ROWS" if modo == "offset" else "OFFSET 0 ROWS"
+    return text(f"""
+        SELECT {columnas}
+        {_SOLICITUD_FROM}
+            {_filtros_sql(incluir_historicas, con_sla)}
+            {seek if modo == "seek" else ""}
+        {order_by}
+        {offset} FETCH NEXT :tamano ROWS ONLY
+    """)
+
+
+def _build_query_count(incluir_historicas: bool, con_sla: bool) -> TextClause:
+    """Total de solicitudes paginables con los filtros dados"""
+    return text(f"""
+        SELECT COUNT(*) as total
+        FROM solicitud s
+        INNER JOIN config_sla c ON s.id_sla = c.id_sla
+        WHERE c.es_activo = 1
+            AND s.estado_cumplimiento_sla LIKE 'EN_PROCESO_%'
+            {_filtros_sql(incluir_historicas, con_sla)}
+    """)
+
+
+_FLAGS = [(h, s) for h in (False, True) for s in (False, True)]
+
+_QUERIES_CRITICAS: Dict[Tuple[bool, bool], TextClause] = {
+    k: _build_query_criticas(*k) for k in _FLAGS
+}
+_QUERIES_LIMITADAS: Dict[Tuple[bool, bool], TextClause] = {
+    k: _build_query_limitada(*k) for k in _FLAGS
+}
+_QUERIES_COUNT: Dict[Tuple[bool, bool], TextClause] = {
+    k: _build_query_count(*k) for k in _FLAGS
+}
+
+
+def _driver_sql(stmt: TextClause) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Compila un TextClause al SQL del driver (placeholders ?) una sola vez.
+    
+    Returns:
+        Tupla (SQL para exec_driver_sql, nombres de parámetros en orden posicional)
+    """
+    compiled = stmt.compile(dialect=engine.dialect)
+    return compiled.string, tuple(compiled.positiontup)
+
+
+# Las páginas de solicitudes son la query de mayor QPS: se ejecutan con
+# exec_driver_sql sobre SQL ya compilado para no pasar por la compilación de
+# SQLAlchemy en cada request. Una variante por ordenamiento, clave
+# (incluir_historicas, modo de paginación).
+_DRIVER_PAGINA_URGENCIA: Dict[Tuple[bool, str], Tuple[str, Tuple[str, ...]]] = {
+    (h, modo): _driver_sql(_build_query_pagina(h, False, modo))
+    for h in (False, True) for modo in ("inicio", "offset")
+}
+_DRIVER_PAGINA_SLA: Dict[Tuple[bool, str], Tuple[str, Tuple[str, ...]]] = {
+    (h, modo): _driver_sql(_build_query_pagina(h, True, modo))
+    for h in (False, True) for modo in _MODOS_PAGINA
+}
+
+
+# Total de registros por combinación de filtros. Solo se usa para calcular
+# total_paginas, así que tolera un desfase de hasta count_cache_ttl segundos y
+# evita repetir el COUNT(*) sobre el mismo join en cada página.
+_count_cache = TTLCache(maxsize=64, ttl=settings.count_cache_ttl)
+
+
+@cached(_count_cache, lock=threading.Lock())
+def _count_solicitudes(incluir_historicas: bool, codigo_sla: Optional[str]) -> int:
+    """Cuenta las solicitudes que coinciden con los filtros de paginación"""
+    query = _QUERIES_COUNT[(incluir_historicas, bool(codigo_sla))]
+    params = _filtros_params(incluir_historicas, codigo_sla)
+    with get_db_session() as session:
+        return session.execute(query, params).scalar() or 0
+
+
+# Primeras páginas recientes por combinación de filtros. Los dashboards piden
+# la misma página 1 en cada auto-refresh; un TTL corto mantiene los datos frescos.
+_page_cache = TTLCache(maxsize=256, ttl=settings.page_cache_ttl)
+_page_cache_lock = threading.Lock()
+
+
+# Columnas que forman la matriz de features del modelo, en orden
+_FEATURES = ("dias_transcurridos", "dias_umbral", "id_rol")
+
+
+def _a_columnas(result) -> Dict[str, Sequence]:
+    """
+    Convierte el resultado de una query de solicitudes a formato columnar.
+    
+    Cada columna queda como una tupla indexada por nombre y los features se
+    copian una sola vez a una matriz float32 contigua 'X', lista para
+    predict_proba sin recorrer dicts por fila.
+    
+    Returns:
+        Diccionario columna -> valores (más 'X'), o {} si no hay filas
+    """
+    nombres = tuple(result.keys())
+    filas = result.all()
+    if not filas:
+        return {}
+    
+    lote = dict(zip(nombres, zip(*filas)))
+    X = np.empty((len(filas), len(_FEATURES)), dtype=np.float32)
+    for j, columna in enumerate(_FEATURES):
+        X[:, j] = lote[columna]
+    X.flags.writeable = False  # el lote puede quedar compartido en _page_cache
+    lote["X"] = X
+    return lote
+
+
+def _execute_driver(session: Session, driver_sql: Tuple[str, Tuple[str, ...]], params: Dict):
+    """Ejecuta SQL precompilado por _driver_sql con los parámetros en orden posicional"""
+    sql, nombres = driver_sql
+    return session.connection().exec_driver_sql(sql, tuple(params[n] for n in nombres))
+
+
+def _offset_pagina(cursor: Optional[Dict], pagina: int, tamano_pagina: int) -> int:
+    """Filas a saltar en el orden por urgencia: las del cursor o las de las páginas previas"""
+    if cursor:
+        return cursor["offset"]
+    return (pagina - 1) * tamano_pagina
+
+
+def _modo_pagina(cursor: Optional[Dict], pagina: int, tamano_pagina: int, params: Dict) -> str:
+    """
+    Completa los parámetros comunes de paginación y retorna el modo.
+    
+    Con cursor de keyset se continúa desde la última fila de la página
+    anterior en lugar de descartar filas con OFFSET (cuyo costo crece con el
+    número de página). El cursor del orden por urgencia es un offset.
+    """
+    params["tamano"] = tamano_pagina
+    if cursor and "id_solicitud" in cursor:
+        params["last_id"] = cursor["id_solicitud"]
+        return "seek"
+    offset = _offset_pagina(cursor, pagina, tamano_pagina)
+    if offset > 0:
+        params["offset"] = offset
+        return "offset"
+    return "inicio"
+
+
+def _query_criticas(
+    limite: int,
+    incluir_historicas: bool,
+    codigo_sla: Optional[str]
+) -> Dict[str, Sequence]:
+    """Solicitudes con 70%+ del tiempo consumido, más antiguas primero"""
+    params = _filtros_params(incluir_historicas, codigo_sla)
+    params["limite"] = limite
+    query = _QUERIES_CRITICAS[(incluir_historicas, bool(codigo_sla))]
+    with get_db_session() as session:
+        return _a_columnas(session.execute(query, params))
+
+
+def _query_muestra_por_sla(
+    limite: int,
+    incluir_historicas: bool,
+    codigo_sla: Optional[str]
+) -> Dict[str, Sequence]:
+    """N solicitudes con distribución equilibrada por SLA"""
+    params = _filtros_params(incluir_historicas, codigo_sla)
+    params["limite"] = limite
+    query = _QUERIES_LIMITADAS[(incluir_historicas, bool(codigo_sla))]
+    with get_db_session() as session:
+        return _a_columnas(session.execute(query, params))
+
+
+def _query_pagina_por_urgencia(
+    cursor: Optional[Dict],
+    pagina: int,
+    tamano_pagina: int,
+    incluir_historicas: bool
+) -> Dict[str, Sequence]:
+    """Página de todos los SLAs ordenada por días restantes (más urgentes primero)"""
+    params = _filtros_params(incluir_historicas, None)
+    modo = _modo_pagina(cursor, pagina, tamano_pagina, params)
+    with get_db_session() as session:
+        result = _execute_driver(session, _DRIVER_PAGINA_URGENCIA[(incluir_historicas, modo)], params)
+        return _a_columnas(result)
+
+
+def _query_pagina_por_sla(
+    codigo_sla: str,
+    cursor: Optional[Dict],
+    pagina: int,
+    tamano_pagina: int,
+    incluir_historicas: bool
+) -> Dict[str, Sequence]:
+    """Página de un SLA ordenada por fecha de solicitud (más recientes primero)"""
+    params = _filtros_params(incluir_historicas, codigo_sla)
+    modo = _modo_pagina(cursor, pagina, tamano_pagina, params)
+    if modo == "seek":
+        params["last_fecha"] = cursor["fecha_solicitud"]
+    with get_db_session() as session:
+        result = _execute_driver(session, _DRIVER_PAGINA_SLA[(incluir_historicas, modo)], params)
+        return _a_columnas(result)
+
+
+def _consultar_solicitudes(
+    solo_criticas: bool,
+    limite: Optional[int],
+    pagina: int,
+    tamano_pagina: int,
+    con_total: bool,
+    incluir_historicas: bool,
+    codigo_sla: Optional[str],
+    cursor: Optional[Dict]
+) -> Dict[str, Sequence] | Tuple[Dict[str, Sequence], int]:
+    """Elige la query de get_solicitudes_activas; propaga los errores de BD"""
+    if solo_criticas:
+        return _query_criticas(limite or 50, incluir_historicas, codigo_sla)
+    
+    # Si se especifica límite, usarlo en lugar de paginación
+    if limite is not None and 0 < limite < 10000:
+        return _query_muestra_por_sla(limite, incluir_historicas, codigo_sla)
+    
+    if codigo_sla:
+        solicitudes = _query_pagina_por_sla(codigo_sla, cursor, pagina, tamano_pagina, incluir_historicas)
+    else:
+        solicitudes = _query_pagina_por_urgencia(cursor, pagina, tamano_pagina, incluir_historicas)
+    
+    if con_total:
+        return solicitudes, _count_solicitudes(incluir_historicas, codigo_sla)
+    return solicitudes
+
+
 def get_solicitudes_activas(
     solo_criticas: bool = False,
-    limite: int = 50,
+    limite: Optional[int] = None,
     pagina: int = 1,
     tamano_pagina: int = 50,
     con_total: bool = False,
     incluir_historicas: bool = False,
-    codigo_sla: str = None
-) -> List[Dict] | Tuple[List[Dict], int]:
+    codigo_sla: str = None,
+    cursor: Optional[Dict] = None
+) -> Dict[str, Sequence] | Tuple[Dict[str, Sequence], int]:
     """
     Obtiene solicitudes activas para predicción.
-    Optimizado para grandes volúmenes con paginación.
+    Optimizado para grandes volúmenes: las páginas de un SLA se paginan por
+    keyset (seek); el orden por urgencia, con OFFSET.
+    La primera página de cada combinación de filtros se cachea page_cache_ttl segundos.
     
     Tablas: solicitud, config_sla, rol_registro
     
     Args:
         solo_criticas: Si True, solo solicitudes con 70%+ del tiempo consumido
-        limite: Límite de registros (para críticas)
-        pagina: Número de página
+        limite: Límite de registros (para críticas o muestra equilibrada por SLA)
+        pagina: Número de página (solo se usa si no se envía cursor)
         tamano_pagina: Registros por página
         con_total: Si True, retorna tupla (datos, total)
         incluir_historicas: Si True, incluye solicitudes completadas/canceladas
         codigo_sla: Filtrar por código SLA específico (SLA1, SLA2, etc.)
+        cursor: Posición de la página siguiente (ver construir_cursor)
     
     Returns:
-        Lista de solicitudes o tupla (solicitudes, total)
+        Solicitudes en formato columnar (ver _a_columnas) o tupla (solicitudes, total)
     """
+    key = (solo_criticas, limite, pagina, tamano_pagina, codigo_sla, incluir_historicas, con_total)
+    cacheable = cursor is None and pagina == 1
+    
+    if cacheable:
+        with _page_cache_lock:
+            resultado = _page_cache.get(key)
+        if resultado is not None:
+            return resultado
+    
+    try:
+        resultado = _consultar_solicitudes(
+            solo_criticas, limite, pagina, tamano_pagina,
+            con_total, incluir_historicas, codigo_sla, cursor
+        )
+    except Exception as e:
+        logger.error(f"Error al obtener solicitudes: {e}")
+        if con_total:
+            return {}, 0
+        return {}
+    
+    if cacheable:
+        with _page_cache_lock:
+            _page_cache[key] = resultado
+    return resultado
+
+
+def construir_cursor(
+    solicitudes: Dict[str, Sequence],
+    tamano_pagina: int,
+    codigo_sla: str = None,
+    cursor: Optional[Dict] = None,
+    pagina: int = 1
+) -> Optional[Dict]:
+    """
+    Construye el cursor de la página siguiente.
+    
+    Args:
+        solicitudes: Página actual retornada por get_solicitudes_activas
+        tamano_pagina: Registros por página solicitados
+        codigo_sla: Mismo filtro SLA usado para obtener la página
+        cursor: Cursor con el que se obtuvo la página actual
+        pagina: Número de página usado si no había cursor
+    
+    Returns:
+        Con codigo_sla, la clave de ordenamiento de la última fila; sin él, el
+        offset de la página siguiente. None si no hay más páginas
+    """
+    if not solicitudes or len(solicitudes["id_solicitud"]) < tamano_pagina:
+        return None
+    
+    if codigo_sla:
+        return {
+            "fecha_solicitud": solicitudes["fecha_cursor"][-1],
+            "id_solicitud": solicitudes["id_solicitud"][-1]
+        }
+    return {"offset": _offset_pagina(cursor, pagina, tamano_pagina) + tamano_pagina}
+
+
+# Resumen de críticas: las mismas filas que _QUERIES_CRITICAS sin filtros, pero
+# el servidor las agrupa por features. El modelo es determinista sobre
+# (dias_transcurridos, dias_umbral, id_rol), así que basta predecir cada
+# combinación distinta una vez y ponderar por su cantidad.
+_QUERY_RESUMEN_CRITICAS = text(f"""
+    SELECT t.dias_transcurridos, t.dias_umbral, t.id_rol, COUNT(*) as cantidad
+    FROM (
+        SELECT
+            x.dias as dias_transcurridos,
+            c.dias_umbral as dias_umbral,
+            s.id_rol_registro as id_rol
+        {_SOLICITUD_FROM}
+            {_filtros_sql(False, False)}
+            AND x.dias >= (c.dias_umbral * 0.7)
+        ORDER BY x.dias DESC
+        OFFSET 0 ROWS FETCH NEXT :limite ROWS ONLY
+    ) t
+    GROUP BY t.dias_transcurridos, t.dias_umbral, t.id_rol
+""")
+
+_resumen_cache = TTLCache(maxsize=8, ttl=settings.page_cache_ttl)
+
+
+@cached(_resumen_cache, lock=threading.Lock())
+def _query_resumen_criticas(limite: int) -> Dict[str, np.ndarray]:
+    """Ejecuta _QUERY_RESUMEN_CRITICAS; propaga los errores de BD"""
+    params = _filtros_params(False, None)
+    params["limite"] = limite
     with get_db_session() as session:
-        try:
-            # Condición de filtro según si incluimos históricas o no
-            estado_filter = ""
-            if not incluir_historicas:
-                estado_filter = "AND s.estado_solicitud NOT IN ('COMPLETADA', 'CANCELADA')"
-            
-            # Filtro por código SLA
-            sla_filter = ""
-            if codigo_sla:
-                sla_filter = f"AND c.codigo_sla = '{codigo_sla}'"
-            
-            # Query base - Adaptado a Proyecto1SLA_DB
-            # Columnas de solicitud: id_solicitud, fecha_solicitud, estado_solicitud, 
-            #                        estado_cumplimiento_sla, id_sla, id_rol_registro, num_dias_sla
-            # Columnas de config_sla: id_sla, codigo_sla, dias_umbral, tipo_solicitud
-            # Columnas de rol_registro: id_rol_registro, nombre_rol, bloque_tech
-            base_query = f"""
-                SELECT 
-                    s.id_solicitud as id_solicitud,
-                    DATEDIFF(day, s.fecha_solicitud, GETDATE()) as dias_transcurridos,
-                    c.dias_umbral as dias_umbral,
-                    s.id_rol_registro as id_rol,
-                    c.codigo_sla as codigo_sla,
-                    r.nombre_rol as nombre_rol,
-                    r.bloque_tech as bloque_tech,
-                    c.dias_umbral - DATEDIFF(day, s.fecha_solicitud, GETDATE()) as dias_restantes,
-                    s.estado_solicitud as estado_solicitud,
-                    s.estado_cumplimiento_sla as estado_cumplimiento
-                FROM solicitud s
-                INNER JOIN config_sla c ON s.id_sla = c.id_sla
-                INNER JOIN rol_registro r ON s.id_rol_registro = r.id_rol_registro
-                WHERE c.es_activo = 1
-                    AND s.estado_cumplimiento_sla LIKE 'EN_PROCESO_%'
-                    {estado_filter}
-                    {sla_filter}
-            """
-            
-            if solo_criticas:
-                # Solo las que han consumido 70%+ del tiempo
-                criticas_query = base_query + """
-                    AND DATEDIFF(day, s.fecha_solicitud, GETDATE()) >= (c.dias_umbral * 0.7)
-                    ORDER BY dias_transcurridos DESC
-                    OFFSET 0 ROWS FETCH NEXT :limite ROWS ONLY
-                """
-                
-                result = session.execute(text(criticas_query), {"limite": limite})
-                solicitudes = [dict(row._mapping) for row in result]
-                return solicitudes
-            
-            # Si se especifica límite, usarlo en lugar de paginación
-            if limite > 0 and limite < 10000:
-                # Construir filtros adicionales
-                where_adicional = ""
-                if not incluir_historicas:
-                    where_adicional += " AND s.estado_solicitud NOT IN ('COMPLETADA', 'CANCELADA')"
-                if codigo_sla:
-                    where_adicional += f" AND c.codigo_sla = '{codigo_sla}'"
-                
-                # Obtener N registros con distribución equilibrada por SLA
-                # Usa ROW_NUMBER() OVER (PARTITION BY codigo_sla) para obtener
-                # una muestra representativa de cada SLA
-                limited_query = f"""
-                    WITH RankedSolicitudes AS (
-                        SELECT 
-                            s.id_solicitud as id_solicitud,
-                            DATEDIFF(day, s.fecha_solicitud, GETDATE()) as dias_transcurridos,
-                            c.dias_umbral as dias_umbral,
-                            s.id_rol_registro as id_rol,
-                            c.codigo_sla as codigo_sla,
-                            r.nombre_rol as nombre_rol,
-                            r.bloque_tech as bloque_tech,
-                            c.dias_umbral - DATEDIFF(day, s.fecha_solicitud, GETDATE()) as dias_restantes,
-                            s.estado_solicitud as estado_solicitud,
-                            s.estado_cumplimiento_sla as estado_cumplimiento,
-                            ROW_NUMBER() OVER (
-                                PARTITION BY c.codigo_sla 
-                                ORDER BY (c.dias_umbral - DATEDIFF(day, s.fecha_solicitud, GETDATE())) ASC
-                            ) as rn
-                        FROM solicitud s
-                        INNER JOIN config_sla c ON s.id_sla = c.id_sla
-                        INNER JOIN rol_registro r ON s.id_rol_registro = r.id_rol_registro
-                        WHERE c.es_activo = 1
-                            AND s.estado_cumplimiento_sla LIKE 'EN_PROCESO_%'
-                            {where_adicional}
-                    )
-                    SELECT 
-                        id_solicitud, dias_transcurridos, dias_umbral, id_rol,
-                        codigo_sla, nombre_rol, bloque_tech, dias_restantes,
-                        estado_solicitud, estado_cumplimiento
-                    FROM RankedSolicitudes
-                    ORDER BY rn, codigo_sla
-                    OFFSET 0 ROWS FETCH NEXT :limite ROWS ONLY
-                """
-                
-                result = session.execute(text(limited_query), {"limite": limite})
-                solicitudes = [dict(row._mapping) for row in result]
-                return solicitudes
-            
-            # Paginado normal
-            offset = (pagina - 1) * tamano_pagina
-            
-            # Si hay filtro de SLA, ordenar por fecha
-            # Si no hay filtro, ordenar por días restantes (más urgentes primero) para ver variedad
-            if codigo_sla:
-                order_by = "ORDER BY s.fecha_solicitud DESC"
-            else:
-                # Ordenar por días restantes ascendente (más urgentes primero)
-                # Esto muestra una mezcla de todos los SLAs según urgencia
-                order_by = "ORDER BY dias_restantes ASC, c.codigo_sla"
-            
-            paginated_query = base_query + f"""
-                {order_by}
-                OFFSET :offset ROWS FETCH NEXT :tamano ROWS ONLY
-            """
-            
-            result = session.execute(
-                text(paginated_query), 
-                {"offset": offset, "tamano": tamano_pagina}
-            )
-            solicitudes = [dict(row._mapping) for row in result]
-            
-            if con_total:
-                count_query = f"""
-                    SELECT COUNT(*) as total
-                    FROM solicitud s
-                    INNER JOIN config_sla c ON s.id_sla = c.id_sla
-                    WHERE c.es_activo = 1
-                        {estado_filter}
-                        {sla_filter}
-                """
-                total = session.execute(text(count_query)).scalar() or 0
-                return solicitudes, total
-            
-            return solicitudes
-            
-        except Exception as e:
-            logger.error(f"Error al obtener solicitudes: {e}")
-            if con_total:
-                return [], 0
-            return []
+        filas = session.execute(_QUERY_RESUMEN_CRITICAS, params).all()
+    if not filas:
+        return {}
+    
+    # Igual que _a_columnas: columna por columna sobre buffers preasignados
+    *features, conteos = zip(*filas)
+    X = np.empty((len(filas), len(features)), dtype=np.float32)
+    for j, columna in enumerate(features):
+        X[:, j] = columna
+    cantidad = np.fromiter(conteos, dtype=np.int64, count=len(filas))
+    X.flags.writeable = False
+    cantidad.flags.writeable = False
+    return {"X": X, "cantidad": cantidad}
+
+
+def get_resumen_criticas(limite: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Combinaciones de features de las solicitudes críticas para el resumen del dashboard.
+    Se cachea page_cache_ttl segundos, igual que la primera página de solicitudes.
+    
+    Args:
+        limite: Solicitudes críticas consideradas (más antiguas primero)
+    
+    Returns:
+        Diccionario con 'X' (features float32, una fila por combinación) y
+        'cantidad' (solicitudes con esa combinación), o {} si no hay datos
+    """
+    try:
+        return _query_resumen_criticas(limite)
+    except Exception as e:
+        logger.error(f"Error al obtener resumen de críticas: {e}")
+        return {}
+
+
+def _build_query_entrenamiento(con_fechas: bool) -> TextClause:
+    """Historial completado; usa num_dias_sla si está disponible, sino calcula"""
+    filtro_fechas = "AND s.fecha_solicitud BETWEEN :fecha_inicio AND :fecha_fin" if con_fechas else ""
+    return text(f"""
+        SELECT TOP (:limite)
+            COALESCE(
+                s.num_dias_sla,
+                DATEDIFF(day, s.fecha_solicitud, COALESCE(s.fecha_ingreso, GETDATE()))
+            ) as dias_transcurridos,
+            c.dias_umbral as dias_umbral,
+            s.id_rol_registro as id_rol,
+            s.incumplio as incumplio
+        FROM solicitud s
+        INNER JOIN config_sla c ON s.id_sla = c.id_sla
+        WHERE s.estado_cumplimiento_sla IS NOT NULL
+            AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
+            {filtro_fechas}
+        ORDER BY s.creado_en DESC
+    """)
+
+
+_QUERIES_ENTRENAMIENTO: Dict[bool, TextClause] = {
+    con_fechas: _build_query_entrenamiento(con_fechas) for con_fechas in (False, True)
+}
+
+
+# Tipos compactos para las columnas de entrenamiento: los features quedan en un
+# solo bloque float32 que el modelo consume directo con to_numpy()
+_DTYPES_ENTRENAMIENTO = {
+    "dias_transcurridos": "float32",
+    "dias_umbral": "float32",
+    "id_rol": "float32",
+    "incumplio": "int8",
+}
+_DTYPE_FILA_ENTRENAMIENTO = np.dtype(list(_DTYPES_ENTRENAMIENTO.items()))
 
+# Filas que se traen del servidor por cada fetch al recorrer el stream
+_ENTRENAMIENTO_YIELD_PER = 500
 
-def get_datos_entrenamiento(limite: int = 10000, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> List[Dict]:
+
+def _datos_entrenamiento_vacios() -> pd.DataFrame:
+    """DataFrame vacío con las columnas y tipos de entrenamiento"""
+    return pd.DataFrame(columns=list(_DTYPES_ENTRENAMIENTO)).astype(_DTYPES_ENTRENAMIENTO)
+
+
+def iter_datos_entrenamiento(limite: int = 10000, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> Iterator[Mapping]:
+    """
+    Recorre el historial de entrenamiento fila por fila.
+    
+    Usa un cursor de servidor (stream_results) y trae bloques de
+    _ENTRENAMIENTO_YIELD_PER filas, así nunca hay más de un bloque en memoria.
+    La sesión queda abierta hasta agotar (o cerrar) el generador.
+    Los errores de BD se propagan al consumidor.
+    
+    Args:
+        limite: Máximo de registros para entrenamiento
+        fecha_inicio: Fecha inicial del rango (YYYY-MM-DD) o None para todos
+        fecha_fin: Fecha final del rango (YYYY-MM-DD) o None para todos
+    
+    Yields:
+        RowMapping con dias_transcurridos, dias_umbral, id_rol, incumplio
+    """
+    params = {"limite": limite}
+    con_fechas = bool(fecha_inicio and fecha_fin)
+    
+    if con_fechas:
+        params["fecha_inicio"] = fecha_inicio
+        params["fecha_fin"] = fecha_fin
+        logger.info(f"Entrenando con rango: {fecha_inicio} a {fecha_fin}")
+    else:
+        logger.info("Entrenando con todos los datos históricos")
+    
+    with get_db_session() as session:
+        result = session.execute(
+            _QUERIES_ENTRENAMIENTO[con_fechas],
+            params,
+            execution_options={"stream_results": True, "yield_per": _ENTRENAMIENTO_YIELD_PER}
+        )
+        yield from result.mappings()
+
+
+def get_datos_entrenamiento(limite: int = 10000, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> pd.DataFrame:
     """
     Obtiene datos históricos para entrenar el modelo.
     Solo usa solicitudes completadas (cumplidas o incumplidas).
@@ -221,61 +709,68 @@ def get_datos_entrenamiento(limite: int = 10000, fecha_inicio: Optional[str] = N
     - NO_CUMPLE_SLA1, NO_CUMPLE_SLA2, ..., NO_CUMPLE_SLA6: No se cumplió el SLA
     - EN_PROCESO_SLA2, EN_PROCESO_SLA3, EN_PROCESO_SLA4: Aún en proceso
     
+    La columna calculada solicitud.incumplio (db/migrations/002) vale 1 para NO_CUMPLE_*.
+    
     Args:
         limite: Máximo de registros para entrenamiento
         fecha_inicio: Fecha inicial del rango (YYYY-MM-DD) o None para todos
         fecha_fin: Fecha final del rango (YYYY-MM-DD) o None para todos
     
     Returns:
-        Lista de diccionarios con datos de entrenamiento
+        DataFrame con columnas dias_transcurridos, dias_umbral, id_rol, incumplio
     """
+    try:
+        # El stream se vuelca directo a un arreglo tipado, sin lista intermedia de dicts
+        filas = np.fromiter(
+            (
+                (m["dias_transcurridos"], m["dias_umbral"], m["id_rol"], m["incumplio"])
+                for m in iter_datos_entrenamiento(limite, fecha_inicio, fecha_fin)
+            ),
+            dtype=_DTYPE_FILA_ENTRENAMIENTO
+        )
+        datos = pd.DataFrame(filas) if len(filas) else _datos_entrenamiento_vacios()
+        
+        logger.info(f"Obtenidos {len(datos)} registros para entrenamiento")
+        return datos
+        
+    except Exception as e:
+        logger.error(f"Error al obtener datos de entrenamiento: {e}")
+        return _datos_entrenamiento_vacios()
+
+
+_QUERY_TENDENCIAS = text("""
+    SELECT 
+        FORMAT(s.fecha_solicitud, 'yyyy-MM') as periodo,
+        COUNT(*) as total_solicitudes,
+        SUM(s.incumplio) as incumplidas,
+        CAST(
+            SUM(s.incumplio) * 1.0 / NULLIF(COUNT(*), 0) * 100 
+            AS DECIMAL(5,2)
+        ) as tasa_incumplimiento
+    FROM solicitud s
+    WHERE s.fecha_solicitud >= DATEADD(month, -:meses, GETDATE())
+        AND s.estado_cumplimiento_sla IS NOT NULL
+        AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
+    GROUP BY FORMAT(s.fecha_solicitud, 'yyyy-MM')
+    ORDER BY periodo DESC
+""")
+
+
+# Las agregaciones de dashboard cambian del orden de horas: se cachean por
+# cache_ttl segundos. Se guardan tuplas de RowMapping (inmutables) para que
+# ningún llamador pueda modificar el valor cacheado. Los errores no se cachean.
+# Las tendencias no se cachean aquí: /tendencias guarda la respuesta ya
+# serializada (response_cache_ttl) y una segunda capa solo la dejaría vieja.
+_estadisticas_sla_cache = TTLCache(maxsize=1, ttl=settings.cache_ttl)
+
+
+def _query_tendencias(meses: int) -> Tuple[Mapping, ...]:
     with get_db_session() as session:
-        try:
-            # Construir filtro de fechas
-            filtro_fechas = ""
-            params = {"limite": limite}
-            
-            if fecha_inicio and fecha_fin:
-                filtro_fechas = "AND s.fecha_solicitud BETWEEN :fecha_inicio AND :fecha_fin"
-                params["fecha_inicio"] = fecha_inicio
-                params["fecha_fin"] = fecha_fin
-                logger.info(f"Entrenando con rango: {fecha_inicio} a {fecha_fin}")
-            else:
-                logger.info("Entrenando con todos los datos históricos")
-            
-            # Usamos num_dias_sla si está disponible, sino calculamos
-            query = text(f"""
-                SELECT TOP (:limite)
-                    COALESCE(
-                        s.num_dias_sla,
-                        DATEDIFF(day, s.fecha_solicitud, COALESCE(s.fecha_ingreso, GETDATE()))
-                    ) as dias_transcurridos,
-                    c.dias_umbral as dias_umbral,
-                    s.id_rol_registro as id_rol,
-                    CASE 
-                        WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1 
-                        ELSE 0 
-                    END as incumplio
-                FROM solicitud s
-                INNER JOIN config_sla c ON s.id_sla = c.id_sla
-                WHERE s.estado_cumplimiento_sla IS NOT NULL
-                    AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
-                    {filtro_fechas}
-                ORDER BY s.creado_en DESC
-            """)
-            
-            result = session.execute(query, params)
-            datos = [dict(row._mapping) for row in result]
-            
-            logger.info(f"Obtenidos {len(datos)} registros para entrenamiento")
-            return datos
-            
-        except Exception as e:
-            logger.error(f"Error al obtener datos de entrenamiento: {e}")
-            return []
+        result = session.execute(_QUERY_TENDENCIAS, {"meses": meses})
+        return tuple(result.mappings())
 
 
-def get_tendencias_historicas(meses: int = 6) -> List[Dict]:
+def get_tendencias_historicas(meses: int = 6) -> Tuple[Mapping, ...]:
     """
     Obtiene tendencias históricas de cumplimiento SLA.
     
@@ -283,42 +778,37 @@ def get_tendencias_historicas(meses: int = 6) -> List[Dict]:
         meses: Cantidad de meses hacia atrás
     
     Returns:
-        Lista con estadísticas por mes
+        Tupla con estadísticas por mes
     """
-    with get_db_session() as session:
-        try:
-            query = text("""
-                SELECT 
-                    FORMAT(s.fecha_solicitud, 'yyyy-MM') as periodo,
-                    COUNT(*) as total_solicitudes,
-                    SUM(CASE 
-                        WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1 
-                        ELSE 0 
-                    END) as incumplidas,
-                    CAST(
-                        SUM(CASE 
-                            WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1.0 
-                            ELSE 0 
-                        END) / NULLIF(COUNT(*), 0) * 100 
-                        AS DECIMAL(5,2)
-                    ) as tasa_incumplimiento
-                FROM solicitud s
-                WHERE s.fecha_solicitud >= DATEADD(month, -:meses, GETDATE())
-                    AND s.estado_cumplimiento_sla IS NOT NULL
-                    AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
-                GROUP BY FORMAT(s.fecha_solicitud, 'yyyy-MM')
-                ORDER BY periodo DESC
-            """)
-            
-            result = session.execute(query, {"meses": meses})
-            return [dict(row._mapping) for row in result]
-            
-        except Exception as e:
-            logger.error(f"Error al obtener tendencias: {e}")
-            return []
+    try:
+        return _query_tendencias(meses)
+    except Exception as e:
+        logger.error(f"Error al obtener tendencias: {e}")
+        return ()
+
 
+_QUERY_ESTADISTICAS_ROL = text("""
+    SELECT 
+        r.nombre_rol,
+        r.bloque_tech,
+        COUNT(*) as total_solicitudes,
+        SUM(s.incumplio) as incumplidas,
+        CAST(
+            SUM(s.incumplio) * 1.0 / NULLIF(COUNT(*), 0) * 100 
+            AS DECIMAL(5,2)
+        ) as tasa_incumplimiento,
+        AVG(COALESCE(s.num_dias_sla, 0)) as promedio_dias
+    FROM solicitud s
+    INNER JOIN rol_registro r ON s.id_rol_registro = r.id_rol_registro
+    WHERE s.fecha_solicitud >= DATEADD(month, -:meses, GETDATE())
+        AND s.estado_cumplimiento_sla IS NOT NULL
+        AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
+    GROUP BY r.nombre_rol, r.bloque_tech
+    ORDER BY tasa_incumplimiento DESC
+""")
 
-def get_estadisticas_por_rol(meses: int = 3) -> List[Dict]:
+
+def get_estadisticas_por_rol(meses: int = 3) -> List[Mapping]:
     """
     Obtiene estadísticas de cumplimiento por rol/bloque tech.
     Útil para identificar qué roles tienen más incumplimientos.
@@ -331,95 +821,114 @@ def get_estadisticas_por_rol(meses: int = 3) -> List[Dict]:
     """
     with get_db_session() as session:
         try:
-            query = text("""
-                SELECT 
-                    r.nombre_rol,
-                    r.bloque_tech,
-                    COUNT(*) as total_solicitudes,
-                    SUM(CASE 
-                        WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1 
-                        ELSE 0 
-                    END) as incumplidas,
-                    CAST(
-                        SUM(CASE 
-                            WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1.0 
-                            ELSE 0 
-                        END) / NULLIF(COUNT(*), 0) * 100 
-                        AS DECIMAL(5,2)
-                    ) as tasa_incumplimiento,
-                    AVG(COALESCE(s.num_dias_sla, 0)) as promedio_dias
-                FROM solicitud s
-                INNER JOIN rol_registro r ON s.id_rol_registro = r.id_rol_registro
-                WHERE s.fecha_solicitud >= DATEADD(month, -:meses, GETDATE())
-                    AND s.estado_cumplimiento_sla IS NOT NULL
-                    AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
-                GROUP BY r.nombre_rol, r.bloque_tech
-                ORDER BY tasa_incumplimiento DESC
-            """)
-            
-            result = session.execute(query, {"meses": meses})
-            return [dict(row._mapping) for row in result]
+            result = session.execute(_QUERY_ESTADISTICAS_ROL, {"meses": meses})
+            return result.mappings().all()
             
         except Exception as e:
             logger.error(f"Error al obtener estadísticas por rol: {e}")
             return []
 
 
-def get_estadisticas_por_sla() -> List[Dict]:
+_QUERY_ESTADISTICAS_SLA = text("""
+    SELECT 
+        c.codigo_sla,
+        c.descripcion as descripcion_sla,
+        c.dias_umbral,
+        c.tipo_solicitud,
+        COUNT(*) as total_solicitudes,
+        SUM(s.incumplio) as incumplidas,
+        CAST(
+            SUM(s.incumplio) * 1.0 / NULLIF(COUNT(*), 0) * 100 
+            AS DECIMAL(5,2)
+        ) as tasa_incumplimiento
+    FROM solicitud s
+    INNER JOIN config_sla c ON s.id_sla = c.id_sla
+    WHERE s.estado_cumplimiento_sla IS NOT NULL
+        AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
+        AND c.es_activo = 1
+    GROUP BY c.codigo_sla, c.descripcion, c.dias_umbral, c.tipo_solicitud
+    ORDER BY tasa_incumplimiento DESC
+""")
+
+
+@cached(_estadisticas_sla_cache, lock=threading.Lock())
+def _query_estadisticas_por_sla() -> Tuple[Mapping, ...]:
+    with get_db_session() as session:
+        result = session.execute(_QUERY_ESTADISTICAS_SLA)
+        return tuple(result.mappings())
+
+
+def get_estadisticas_por_sla() -> Tuple[Mapping, ...]:
     """
-    Obtiene estadísticas de cumplimiento por tipo de SLA.
+    Obtiene estadísticas de cumplimiento por tipo de SLA (cacheadas por cache_ttl).
     
     Returns:
-        Lista con estadísticas por código SLA
+        Tupla con estadísticas por código SLA
     """
-    with get_db_session() as session:
-        try:
-            query = text("""
-                SELECT 
-                    c.codigo_sla,
-                    c.descripcion as descripcion_sla,
-                    c.dias_umbral,
-                    c.tipo_solicitud,
-                    COUNT(*) as total_solicitudes,
-                    SUM(CASE 
-                        WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1 
-                        ELSE 0 
-                    END) as incumplidas,
-                    CAST(
-                        SUM(CASE 
-                            WHEN s.estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1.0 
-                            ELSE 0 
-                        END) / NULLIF(COUNT(*), 0) * 100 
-                        AS DECIMAL(5,2)
-                    ) as tasa_incumplimiento
-                FROM solicitud s
-                INNER JOIN config_sla c ON s.id_sla = c.id_sla
-                WHERE s.estado_cumplimiento_sla IS NOT NULL
-                    AND s.estado_cumplimiento_sla NOT LIKE 'EN_PROCESO%'
-                    AND c.es_activo = 1
-                GROUP BY c.codigo_sla, c.descripcion, c.dias_umbral, c.tipo_solicitud
-                ORDER BY tasa_incumplimiento DESC
-            """)
-            
-            result = session.execute(query)
-            return [dict(row._mapping) for row in result]
-            
-        except Exception as e:
-            logger.error(f"Error al obtener estadísticas por SLA: {e}")
-            return []
+    try:
+        return _query_estadisticas_por_sla()
+    except Exception as e:
+        logger.error(f"Error al obtener estadísticas por SLA: {e}")
+        return ()
+
+
+_QUERY_PING = text("SELECT 1")
+
+# Momento (time.monotonic) del último SELECT 1 exitoso
+_ultima_conexion_ok: float = 0.0
 
 
 def verificar_conexion() -> bool:
-    """Verifica si la conexión a la BD está activa"""
+    """
+    Verifica si la conexión a la BD está activa.
+    
+    Un resultado positivo se reutiliza durante cache_ttl_health segundos para
+    que los health checks frecuentes no ocupen conexiones del pool; las
+    conexiones viejas ya las detecta pool_pre_ping.
+    """
+    global _ultima_conexion_ok
+    
+    if time.monotonic() - _ultima_conexion_ok < settings.cache_ttl_health:
+        return True
+    
     try:
         with get_db_session() as session:
-            session.execute(text("SELECT 1"))
-            return True
+            session.execute(_QUERY_PING)
+        _ultima_conexion_ok = time.monotonic()
+        return True
     except Exception as e:
         logger.error(f"Error de conexión a BD: {e}")
         return False
 
 
+# Las tres consultas de filtros van en un solo batch (un round-trip a SQL Server).
+# Se ejecuta con el cursor del driver porque Result de SQLAlchemy no expone nextset().
+# Sin SET NOCOUNT: solo hay SELECTs, y la opción quedaría activa en la conexión
+# del pool para todas las sentencias siguientes.
+_SQL_FILTROS_BATCH = """
+    SELECT DISTINCT c.codigo_sla, c.descripcion, c.dias_umbral, c.tipo_solicitud
+    FROM config_sla c
+    WHERE c.es_activo = 1
+    ORDER BY c.codigo_sla;
+
+    SELECT DISTINCT r.id_rol_registro, r.nombre_rol, r.bloque_tech
+    FROM rol_registro r
+    WHERE r.es_activo = 1
+    ORDER BY r.nombre_rol;
+
+    SELECT DISTINCT bloque_tech
+    FROM rol_registro
+    WHERE bloque_tech IS NOT NULL AND es_activo = 1
+    ORDER BY bloque_tech;
+"""
+
+
+def _fetch_dicts(cursor) -> List[Dict]:
+    """Lee el result set actual de un cursor DBAPI como lista de diccionarios"""
+    columnas = [col[0] for col in cursor.description]
+    return [dict(zip(columnas, row)) for row in cursor.fetchall()]
+
+
 def get_filtros_disponibles() -> Dict:
     """
     Obtiene los valores disponibles para filtros desde la BD.
@@ -432,35 +941,22 @@ def get_filtros_disponibles() -> Dict:
     """
     with get_db_session() as session:
         try:
-            # Códigos SLA activos
-            sla_query = text("""
-                SELECT DISTINCT c.codigo_sla, c.descripcion, c.dias_umbral, c.tipo_solicitud
-                FROM config_sla c
-                WHERE c.es_activo = 1
-                ORDER BY c.codigo_sla
-            """)
-            sla_result = session.execute(sla_query)
-            codigos_sla = [dict(row._mapping) for row in sla_result]
-            
-            # Roles disponibles
-            roles_query = text("""
-                SELECT DISTINCT r.id_rol_registro, r.nombre_rol, r.bloque_tech
-                FROM rol_registro r
-                WHERE r.es_activo = 1
-                ORDER BY r.nombre_rol
-            """)
-            roles_result = session.execute(roles_query)
-            roles = [dict(row._mapping) for row in roles_result]
-            
-            # Bloques tecnológicos
-            bloques_query = text("""
-                SELECT DISTINCT bloque_tech
-                FROM rol_registro
-                WHERE bloque_tech IS NOT NULL AND es_activo = 1
-                ORDER BY bloque_tech
-            """)
-            bloques_result = session.execute(bloques_query)
-            bloques_tech = [row[0] for row in bloques_result]
+            cursor = session.connection().connection.cursor()
+            try:
+                cursor.execute(_SQL_FILTROS_BATCH)
+                
+                # Códigos SLA activos
+                codigos_sla = _fetch_dicts(cursor)
+                
+                # Roles disponibles
+                cursor.nextset()
+                roles = _fetch_dicts(cursor)
+                
+                # Bloques tecnológicos
+                cursor.nextset()
+                bloques_tech = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
             
             return {
                 "codigos_sla": codigos_sla,
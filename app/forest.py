@@ -0,0 +1,189 @@
+"""
+Representación compacta del Random Forest para inferencia.
+
+El pipeline entrenado (StandardScaler + RandomForestClassifier) se aplana en
+arreglos NumPy por árbol y nodo, con el escalado ya incorporado en los
+umbrales: la inferencia compara los features crudos (float32) sin pasar por
+sklearn, y el modelo se persiste como un .npz que carga sin unpickling.
+"""
+import os
+import tempfile
+from typing import Dict
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+_CAMPOS = ("feature", "threshold", "left", "right", "valor", "profundidad", "feature_importances")
+
+
+def _umbrales_crudos(scaler, n_features: int, f: np.ndarray, umbral: np.ndarray) -> np.ndarray:
+    """
+    Umbral float32 sobre el feature crudo equivalente a cada nodo de sklearn.
+
+    sklearn decide float64(float32(escalar(x))) <= umbral. Esa decisión es
+    monótona en x, así que existe un mayor float32 c que la cumple: x <= c
+    reproduce el nodo exactamente. Se parte de umbral * scale + mean y se
+    ajusta de a un ulp evaluando con el propio scaler (con días enteros es
+    común que el umbral caiga justo sobre un valor posible de x).
+    """
+    # Árbol de una sola hoja (bootstrap con una sola clase): no hay umbrales
+    if len(f) == 0:
+        return np.empty(0, dtype=np.float32)
+    
+    filas = np.arange(len(f))
+
+    def cumple(c: np.ndarray) -> np.ndarray:
+        M = np.zeros((len(f), n_features), dtype=np.float32)
+        M[filas, f] = c
+        if scaler is not None:
+            M = scaler.transform(M)
+        return M[filas, f].astype(np.float32).astype(np.float64) <= umbral
+
+    if scaler is not None:
+        c = (umbral * scaler.scale_[f] + scaler.mean_[f]).astype(np.float32)
+    else:
+        c = umbral.astype(np.float32)
+
+    # Bajar mientras el candidato no cumple, luego subir mientras el siguiente cumple
+    no_cumple = ~cumple(c)
+    while no_cumple.any():
+        c[no_cumple] = np.nextafter(c[no_cumple], np.float32(-np.inf))
+        no_cumple = ~cumple(c)
+    siguiente = np.nextafter(c, np.float32(np.inf))
+    sube = cumple(siguiente)
+    while sube.any():
+        c[sube] = siguiente[sube]
+        siguiente = np.nextafter(c, np.float32(np.inf))
+        sube &= cumple(siguiente)
+    return c
+
+
+class ForestCompacto:
+    """
+    Árboles del forest como arreglos (T árboles, N nodos máximo por árbol).
+
+    Las hojas (y el relleno de árboles más chicos) apuntan a sí mismas en
+    left/right, así recorrer un árbol más allá de su profundidad no cambia
+    el nodo alcanzado.
+    """
+
+    def __init__(self, arreglos: Dict[str, np.ndarray]):
+        self.feature = arreglos["feature"]
+        self.threshold = arreglos["threshold"]
+        self.left = arreglos["left"]
+        self.right = arreglos["right"]
+        self.valor = arreglos["valor"]
+        self.profundidad = arreglos["profundidad"]
+        self.feature_importances_ = arreglos["feature_importances"]
+
+        # Vista plana (T * N) para recorrer todos los árboles a la vez: los
+        # hijos pasan a índices globales sumando el desplazamiento del árbol
+        T, N = self.feature.shape
+        desplazamiento = (np.arange(T, dtype=np.intp) * N)[:, None]
+        self._raices = desplazamiento
+        self._feature_plano = self.feature.ravel()
+        self._threshold_plano = self.threshold.ravel()
+        self._left_plano = (self.left + desplazamiento).ravel()
+        self._right_plano = (self.right + desplazamiento).ravel()
+        self._valor_plano = self.valor.ravel()
+        self._profundidad_max = int(self.profundidad.max()) if T else 0
+
+    @classmethod
+    def desde_pipeline(cls, pipeline: Pipeline) -> "ForestCompacto":
+        """Aplana un pipeline entrenado (scaler opcional + RandomForestClassifier)"""
+        forest = pipeline.named_steps["classifier"]
+        scaler = pipeline.named_steps.get("scaler")
+
+        # Probabilidad de incumplimiento (clase 1); con una sola clase, la única
+        clase = 1 if len(forest.classes_) > 1 else 0
+
+        arboles = [estimador.tree_ for estimador in forest.estimators_]
+        T = len(arboles)
+        N = max(arbol.node_count for arbol in arboles)
+
+        nodos = np.arange(N, dtype=np.int32)
+        feature = np.zeros((T, N), dtype=np.int32)
+        threshold = np.zeros((T, N), dtype=np.float32)
+        left = np.tile(nodos, (T, 1))
+        right = np.tile(nodos, (T, 1))
+        valor = np.zeros((T, N), dtype=np.float64)
+        profundidad = np.zeros(T, dtype=np.int32)
+
+        for t, arbol in enumerate(arboles):
+            n = arbol.node_count
+            internos = arbol.children_left >= 0
+            f = np.where(internos, arbol.feature, 0)
+
+            feature[t, :n] = f
+            threshold[t, :n][internos] = _umbrales_crudos(
+                scaler, forest.n_features_in_, f[internos], arbol.threshold[internos]
+            )
+            left[t, :n] = np.where(internos, arbol.children_left, nodos[:n])
+            right[t, :n] = np.where(internos, arbol.children_right, nodos[:n])
+
+            conteos = arbol.value[:, 0, :]
+            valor[t, :n] = conteos[:, clase] / conteos.sum(axis=1)
+            profundidad[t] = arbol.max_depth
+
+        return cls({
+            "feature": feature,
+            "threshold": threshold,
+            "left": left,
+            "right": right,
+            "valor": valor,
+            "profundidad": profundidad,
+            "feature_importances": np.asarray(forest.feature_importances_, dtype=np.float64),
+        })
+
+    @classmethod
+    def cargar(cls, path: str) -> "ForestCompacto":
+        """Carga un modelo guardado con guardar()"""
+        with np.load(path) as datos:
+            return cls({campo: datos[campo] for campo in _CAMPOS})
+
+    def guardar(self, path: str):
+        """Escribe el modelo como .npz (reemplazo atómico para otros procesos que recargan)"""
+        # Temporal único en el mismo directorio: varios workers pueden guardar a la vez
+        descriptor, temporal = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                np.savez(f, **{
+                    "feature": self.feature,
+                    "threshold": self.threshold,
+                    "left": self.left,
+                    "right": self.right,
+                    "valor": self.valor,
+                    "profundidad": self.profundidad,
+                    "feature_importances": self.feature_importances_,
+                })
+            os.replace(temporal, path)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+    def predecir_probabilidad(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilidad de incumplimiento por fila (promedio de los árboles).
+
+        Args:
+            X: Matriz (n, 3) con dias_transcurridos, dias_umbral, id_rol
+
+        Returns:
+            Arreglo float64 (n,)
+        """
+        # Mismo tipo con el que se calcularon los umbrales (como hace sklearn)
+        X = np.asarray(X, dtype=np.float32)
+        T = len(self.profundidad)
+
+        # Todos los árboles avanzan juntos: nodo[t, i] indexa los arreglos
+        # aplanados. Tras la profundidad máxima cada fila quedó en una hoja
+        # (las hojas son punto fijo), aunque su árbol fuera más bajo.
+        nodo = np.broadcast_to(self._raices, (T, len(X)))
+        columnas = np.arange(len(X))
+        for _ in range(self._profundidad_max):
+            va_izquierda = X[columnas, self._feature_plano[nodo]] <= self._threshold_plano[nodo]
+            nodo = np.where(va_izquierda, self._left_plano[nodo], self._right_plano[nodo])
+
+        return self._valor_plano[nodo].mean(axis=0)
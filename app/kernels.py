@@ -0,0 +1,91 @@
+"""
+Kernels numéricos para el post-proceso de predicciones en batch.
+
+Trabajan sobre arreglos NumPy completos y devuelven códigos enteros; la
+traducción a strings se hace con tablas estáticas indexadas por código.
+"""
+import numpy as np
+
+# Nivel de riesgo por código (0=BAJO .. 3=CRITICO)
+NIVELES_RIESGO = ("BAJO", "MEDIO", "ALTO", "CRITICO")
+_CORTES_NIVEL = np.array([0.4, 0.6, 0.8])
+
+# Bits de factores de riesgo
+FACTOR_TIEMPO_90 = 1 << 0
+FACTOR_TIEMPO_70 = 1 << 1
+FACTOR_ALTA_PROB = 1 << 2
+FACTOR_UMBRAL_CORTO = 1 << 3
+
+_TEXTO_FACTOR = (
+    (FACTOR_TIEMPO_90, "Tiempo casi agotado (>90%)"),
+    (FACTOR_TIEMPO_70, "Tiempo elevado (>70%)"),
+    (FACTOR_ALTA_PROB, "Alta probabilidad histórica de incumplimiento"),
+    (FACTOR_UMBRAL_CORTO, "SLA con umbral muy corto"),
+)
+
+# Lista de factores para cada máscara posible, en el mismo orden que
+# identificar_factores_riesgo
+FACTORES_POR_MASCARA = tuple(
+    tuple(texto for bit, texto in _TEXTO_FACTOR if mascara & bit)
+    for mascara in range(1 << len(_TEXTO_FACTOR))
+)
+
+
+def nivel_riesgo_vec(probs: np.ndarray) -> np.ndarray:
+    """
+    Código de nivel de riesgo para cada probabilidad.
+
+    Returns:
+        int8[:] con 0=BAJO, 1=MEDIO, 2=ALTO, 3=CRITICO
+    """
+    # side="right": una probabilidad igual al corte cae en el nivel superior (>=)
+    return np.searchsorted(_CORTES_NIVEL, probs, side="right").astype(np.int8)
+
+
+def _mascara_tiempo(dt: np.ndarray, du: np.ndarray) -> np.ndarray:
+    """
+    Bits de tiempo consumido (bit0 >90%, bit1 >70%) calculados aritméticamente.
+
+    El porcentaje se compara sin dividir (dt >= 0.9 * du), lo que además
+    resuelve umbrales en cero sin casos especiales.
+    """
+    con_umbral = du > 0
+    tiempo_90 = con_umbral & (dt * 10 >= du * 9)
+    tiempo_70 = con_umbral & (dt * 10 >= du * 7) & ~tiempo_90
+    return tiempo_90.astype(np.uint8) | (tiempo_70.astype(np.uint8) << 1)
+
+
+# Los días son enteros pequeños: los bits de tiempo de cada par (dt, du) en
+# [0, _LUT_DIAS) se precalculan en una tabla de 256 KB, así el caso común es
+# una sola lectura por fila en lugar de multiplicaciones y comparaciones.
+_LUT_DIAS = 512
+_dt_lut, _du_lut = np.meshgrid(np.arange(_LUT_DIAS), np.arange(_LUT_DIAS), indexing="ij")
+_LUT_TIEMPO = _mascara_tiempo(_dt_lut, _du_lut)
+del _dt_lut, _du_lut
+
+
+def _bits_tiempo(dt: np.ndarray, du: np.ndarray) -> np.ndarray:
+    """Bits de tiempo por tabla para días enteros en rango; aritmético para el resto"""
+    with np.errstate(invalid="ignore"):
+        dti = dt.astype(np.intp)
+        dui = du.astype(np.intp)
+    # Enteros exactos (descarta fracciones y NaN) y ambos dentro de [0, _LUT_DIAS)
+    en_tabla = (dti == dt) & (dui == du) & (((dti | dui) & ~(_LUT_DIAS - 1)) == 0)
+
+    if en_tabla.all():
+        return _LUT_TIEMPO[dti, dui]
+    desde_tabla = _LUT_TIEMPO[dti & (_LUT_DIAS - 1), dui & (_LUT_DIAS - 1)]
+    return np.where(en_tabla, desde_tabla, _mascara_tiempo(dt, du))
+
+
+def factores_mask_vec(dt: np.ndarray, du: np.ndarray, probs: np.ndarray) -> np.ndarray:
+    """
+    Máscara de factores de riesgo para cada solicitud.
+
+    Returns:
+        uint8[:] con bit0 >90%, bit1 >70%, bit2 alta probabilidad, bit3 umbral corto
+    """
+    mascara = _bits_tiempo(dt, du)
+    mascara |= (probs >= 0.8).astype(np.uint8) << 2
+    mascara |= (du <= 3).astype(np.uint8) << 3
+    return mascara
@@ -1,18 +1,30 @@
 """
 FastAPI - Microservicio de Predicción SLA
 """
+import base64
+import contextvars
+import functools
+import heapq
+import json
 import logging
+import re
+import threading
 from datetime import datetime
-from typing import List, Optional
+from operator import itemgetter
+from typing import Dict, List, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import asyncio
+import anyio
 from concurrent.futures import ThreadPoolExecutor
+import orjson
+from cachetools import TTLCache
 
-from .config import get_settings
+from .config import settings
 from .schemas import (
     PrediccionRequest,
     PrediccionResponse,
@@ -23,23 +35,26 @@ from .schemas import (
     ReentrenamientoResponse
 )
 from .database import (
+    request_db_session,
     get_solicitudes_activas,
+    construir_cursor,
+    get_resumen_criticas,
     get_tendencias_historicas,
     verificar_conexion,
     get_filtros_disponibles
 )
+from .batcher import iniciar_batcher, detener_batcher, predecir_agrupado
 from .model import (
     get_modelo,
-    predecir,
+    recargar_modelo,
+    recargar_si_cambio,
     predecir_batch,
+    resumir_predicciones,
     forzar_reentrenamiento,
     modelo_esta_cargado,
     get_modelo_info
 )
 
-# Configuración
-settings = get_settings()
-
 # Logging
 logging.basicConfig(
     level=getattr(logging, settings.log_level),
@@ -47,8 +62,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Thread pool para operaciones pesadas
-executor = ThreadPoolExecutor(max_workers=4)
+# Thread pool para tareas de fondo (carga y recarga del modelo, predicciones agrupadas).
+# Los endpoints son def y Starlette los ejecuta en su propio threadpool.
+executor = ThreadPoolExecutor(max_workers=2)
+
+
+def _run_in_executor(func, *args, **kwargs):
+    """
+    Ejecuta func fuera del event loop, en el thread pool.
+    
+    Copia el contexto actual para que los helpers de BD vean la sesión del
+    request abierta por la dependencia request_db_session.
+    """
+    ctx = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(ctx.run, func, *args, **kwargs)
+    )
+
+
+async def _recargar_modelo_periodicamente():
+    """
+    Mantiene el modelo al día fuera del camino de predicción.
+    
+    Cada model_check_interval segundos revisa si otro worker guardó un .npz
+    nuevo (p. ej. tras /modelo/reentrenar) y lo carga; además recarga
+    completo cada model_reload_interval segundos.
+    """
+    loop = asyncio.get_running_loop()
+    proxima_recarga = loop.time() + settings.model_reload_interval
+    while True:
+        await asyncio.sleep(settings.model_check_interval)
+        try:
+            if loop.time() >= proxima_recarga:
+                proxima_recarga = loop.time() + settings.model_reload_interval
+                await _run_in_executor(recargar_modelo)
+                logger.info("🔄 Modelo recargado")
+            elif await _run_in_executor(recargar_si_cambio):
+                logger.info("🔄 Modelo recargado (archivo actualizado por otro worker)")
+        except Exception as e:
+            logger.error(f"⚠️ Error al recargar modelo: {e}")
 
 
 @asynccontextmanager
@@ -57,17 +109,25 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Iniciando servicio de predicción SLA...")
     
+    # Hilos disponibles para endpoints def (por defecto anyio usa 40)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    
     # Pre-cargar modelo
     try:
-        await asyncio.get_event_loop().run_in_executor(executor, get_modelo)
+        await _run_in_executor(get_modelo)
         logger.info("✅ Modelo cargado exitosamente")
     except Exception as e:
         logger.error(f"⚠️ Error al cargar modelo: {e}")
     
+    tarea_recarga = asyncio.create_task(_recargar_modelo_periodicamente())
+    iniciar_batcher(executor)
+    
     yield
     
     # Shutdown
     logger.info("👋 Cerrando servicio de predicción...")
+    tarea_recarga.cancel()
+    detener_batcher()
     executor.shutdown(wait=True)
 
 
@@ -78,6 +138,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -90,6 +151,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints que consultan la BD: una sola sesión por request, compartida por
+# todos los helpers (el resto de las rutas no abre ninguna)
+_CON_SESION_BD = [Depends(request_db_session)]
+
+
+# Respuestas ya serializadas de endpoints de dashboard: un hit no toca la BD
+# ni Pydantic. /tendencias por meses; /filtros es un único valor. Es la única
+# capa de caché de ambos (los helpers de BD que usan consultan siempre), así
+# el TTL de cada uno es la antigüedad máxima de la respuesta.
+_tendencias_cache = TTLCache(maxsize=32, ttl=settings.response_cache_ttl)
+_tendencias_cache_lock = threading.Lock()
+_filtros_cache = TTLCache(maxsize=1, ttl=settings.cache_ttl)
+_filtros_cache_lock = threading.Lock()
+
+
+def _encode_cursor(cursor: Optional[Dict]) -> Optional[str]:
+    """Serializa el cursor de paginación como base64 opaco para el cliente"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(orjson.dumps(jsonable_encoder(cursor))).decode()
+
+
+# Formato de fecha_cursor (CONVERT estilo 121 de date, datetime o datetime2)
+_FECHA_CURSOR = re.compile(r"\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2}(\.\d{1,7})?)?")
+
+
+def _decode_cursor(cursor: Optional[str], codigo_sla: Optional[str] = None) -> Optional[Dict]:
+    """
+    Decodifica el cursor recibido; lanza 400 si no es válido.
+    
+    El cursor debe corresponder al mismo modo de paginación que
+    construir_cursor: la clave (fecha_solicitud, id_solicitud) con codigo_sla
+    y el offset de la página siguiente sin él.
+    """
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(payload, dict):
+            raise ValueError("se esperaba un objeto")
+        
+        campos = ("fecha_solicitud", "id_solicitud") if codigo_sla else ("offset",)
+        for campo in campos:
+            if campo not in payload:
+                raise ValueError(f"falta '{campo}' (el cursor no corresponde a este filtro)")
+        
+        if codigo_sla:
+            if type(payload["id_solicitud"]) is not int:
+                raise ValueError("'id_solicitud' debe ser entero")
+            # Se reenvía como texto: SQL Server lo convierte al tipo de la columna
+            fecha = payload["fecha_solicitud"]
+            if not isinstance(fecha, str) or not _FECHA_CURSOR.fullmatch(fecha):
+                raise ValueError("'fecha_solicitud' no es una fecha válida")
+        elif type(payload["offset"]) is not int or payload["offset"] < 0:
+            raise ValueError("'offset' debe ser un entero no negativo")
+        return payload
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {e}")
+
+
+def _prediccion_json(
+    id_solicitud, codigo_sla, nombre_rol, estado_cumplimiento_sla,
+    probabilidad, nivel_riesgo, dias_restantes, fecha_prediccion, factores_riesgo
+) -> Dict:
+    """Una fila de predicción con los campos y el orden de PrediccionResponse"""
+    return {
+        "id_solicitud": id_solicitud,
+        "codigo_sla": codigo_sla,
+        "nombre_rol": nombre_rol,
+        "estado_cumplimiento_sla": estado_cumplimiento_sla,
+        "probabilidad_incumplimiento": probabilidad,
+        "nivel_riesgo": nivel_riesgo,
+        "dias_restantes": dias_restantes,
+        "fecha_prediccion": fecha_prediccion,
+        "factores_riesgo": factores_riesgo
+    }
+
+
+def _json_response(contenido) -> Response:
+    """
+    Respuesta con el contenido ya serializado por orjson.
+    
+    Devolver un Response hace que FastAPI no vuelva a validar ni a pasar por
+    jsonable_encoder el resultado; response_model queda solo para la
+    documentación. Los tipos que orjson no conoce (p. ej. Decimal de la BD)
+    se convierten con jsonable_encoder.
+    """
+    return Response(
+        content=orjson.dumps(contenido, default=jsonable_encoder),
+        media_type="application/json"
+    )
+
 
 # =============================================================================
 # ENDPOINTS
@@ -121,8 +274,8 @@ async def health_check():
     )
 
 
-@app.get("/filtros", tags=["Info"])
-async def obtener_filtros():
+@app.get("/filtros", tags=["Info"], dependencies=_CON_SESION_BD)
+def obtener_filtros():
     """
     Obtiene las opciones de filtros disponibles desde la BD.
     
@@ -130,11 +283,16 @@ async def obtener_filtros():
     Útil para cargar dinámicamente las opciones de filtrado en el frontend.
     """
     try:
-        filtros = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            get_filtros_disponibles
-        )
-        return filtros
+        with _filtros_cache_lock:
+            contenido = _filtros_cache.get("filtros")
+        if contenido is None:
+            filtros = get_filtros_disponibles()
+            contenido = orjson.dumps(jsonable_encoder(filtros))
+            # Un error de BD devuelve listas vacías: eso no se cachea
+            if any(filtros.values()):
+                with _filtros_cache_lock:
+                    _filtros_cache["filtros"] = contenido
+        return Response(content=contenido, media_type="application/json")
     except Exception as e:
         logger.error(f"Error al obtener filtros: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -146,16 +304,14 @@ async def predecir_individual(request: PrediccionRequest):
     Predicción individual para una solicitud específica.
     
     Uso: Cuando el usuario ve el detalle de una solicitud.
+    Las peticiones concurrentes se agrupan en una sola llamada al modelo.
     Tiempo de respuesta esperado: < 50ms
     """
     try:
-        probabilidad, nivel_riesgo, factores = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: predecir(
-                request.dias_transcurridos,
-                request.dias_umbral,
-                request.id_rol
-            )
+        probabilidad, nivel_riesgo, factores = await predecir_agrupado(
+            request.dias_transcurridos,
+            request.dias_umbral,
+            request.id_rol
         )
         
         return PrediccionResponse(
@@ -170,8 +326,13 @@ async def predecir_individual(request: PrediccionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/predecir/criticas", response_model=List[PrediccionResponse], tags=["Predicción"])
-async def predecir_criticas(
+@app.get(
+    "/predecir/criticas",
+    response_model=List[PrediccionResponse],
+    tags=["Predicción"],
+    dependencies=_CON_SESION_BD,
+)
+def predecir_criticas(
     limite: int = Query(default=100, ge=1, le=500, description="Máximo de resultados")
 ):
     """
@@ -182,71 +343,80 @@ async def predecir_criticas(
     """
     try:
         # Obtener TODAS las solicitudes EN_PROCESO (no solo críticas)
-        solicitudes = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: get_solicitudes_activas(solo_criticas=False, limite=limite)
-        )
+        solicitudes = get_solicitudes_activas(solo_criticas=False, limite=limite)
         
         if not solicitudes:
             return []
         
         # Predicción batch
-        resultados = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: predecir_batch(solicitudes)
+        resultados = predecir_batch(solicitudes)
+        
+        # Top por probabilidad descendente antes de construir las responses
+        filas = heapq.nlargest(
+            limite,
+            zip(
+                resultados['id_solicitud'],
+                resultados['codigo_sla'],
+                resultados['nombre_rol'],
+                resultados['estado_cumplimiento'],
+                resultados['probabilidad_incumplimiento'],
+                resultados['nivel_riesgo'],
+                resultados['dias_restantes'],
+                resultados['factores_riesgo']
+            ),
+            key=itemgetter(4)
         )
         
-        # Mapear a response y ordenar por probabilidad
+        # Misma marca de tiempo para todo el batch
+        ahora = datetime.now()
+        
+        # Mapear a response (valores ya calculados: se serializan sin re-validar)
         predicciones = [
-            PrediccionResponse(
-                id_solicitud=r['id_solicitud'],
-                codigo_sla=r['codigo_sla'],
-                nombre_rol=r['nombre_rol'],
-                estado_cumplimiento_sla=r.get('estado_cumplimiento'),
-                probabilidad_incumplimiento=r['probabilidad_incumplimiento'],
-                nivel_riesgo=r['nivel_riesgo'],
-                dias_restantes=r['dias_restantes'],
-                fecha_prediccion=datetime.now(),
-                factores_riesgo=r['factores_riesgo']
-            )
-            for r in resultados
+            _prediccion_json(id_solicitud, codigo, rol, estado, prob, nivel, restantes, ahora, factores)
+            for id_solicitud, codigo, rol, estado, prob, nivel, restantes, factores in filas
         ]
         
-        # Ordenar por probabilidad descendente
-        predicciones.sort(key=lambda x: x.probabilidad_incumplimiento, reverse=True)
-        
-        return predicciones
+        return _json_response(predicciones)
         
     except Exception as e:
         logger.error(f"Error en predicciones críticas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/predecir/paginado", response_model=PrediccionBatchResponse, tags=["Predicción"])
-async def predecir_paginado(
+@app.get(
+    "/predecir/paginado",
+    response_model=PrediccionBatchResponse,
+    tags=["Predicción"],
+    dependencies=_CON_SESION_BD,
+)
+def predecir_paginado(
     pagina: int = Query(default=1, ge=1, description="Número de página"),
     tamano_pagina: int = Query(default=50, ge=1, le=100, description="Registros por página"),
     incluir_historicas: bool = Query(default=True, description="Incluir solicitudes completadas/canceladas"),
-    codigo_sla: str = Query(default=None, description="Filtrar por código SLA (ej: SLA1, SLA2)")
+    codigo_sla: str = Query(default=None, description="Filtrar por código SLA (ej: SLA1, SLA2)"),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco retornado en next_cursor")
 ):
     """
     Predicción paginada para tabla completa.
     
     Optimizado para grandes volúmenes. No carga todo a memoria.
     Por defecto incluye todas las solicitudes (activas e históricas).
+    Para páginas siguientes enviar el `next_cursor` de la respuesta anterior.
+    Con `codigo_sla` el cursor es un seek por fecha y el costo de cada página
+    no depende de su profundidad; sin él (orden por urgencia) es un offset.
     Tiempo de respuesta esperado: < 500ms
     """
+    cursor_actual = _decode_cursor(cursor, codigo_sla)
+    
     try:
         # Obtener solicitudes paginadas
-        solicitudes, total = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: get_solicitudes_activas(
-                pagina=pagina,
-                tamano_pagina=tamano_pagina,
-                con_total=True,
-                incluir_historicas=incluir_historicas,
-                codigo_sla=codigo_sla
-            )
+        solicitudes, total = get_solicitudes_activas(
+            pagina=pagina,
+            tamano_pagina=tamano_pagina,
+            con_total=True,
+            incluir_historicas=incluir_historicas,
+            codigo_sla=codigo_sla,
+            cursor=cursor_actual
         )
         
         if not solicitudes:
@@ -259,43 +429,50 @@ async def predecir_paginado(
             )
         
         # Predicción batch
-        resultados = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: predecir_batch(solicitudes)
-        )
+        resultados = predecir_batch(solicitudes)
         
-        # Mapear a response
+        # Misma marca de tiempo para todo el batch
+        ahora = datetime.now()
+        
+        # Mapear a response (una pasada sobre las columnas, sin re-validar)
         predicciones = [
-            PrediccionResponse(
-                id_solicitud=r['id_solicitud'],
-                codigo_sla=r['codigo_sla'],
-                nombre_rol=r['nombre_rol'],
-                probabilidad_incumplimiento=r['probabilidad_incumplimiento'],
-                nivel_riesgo=r['nivel_riesgo'],
-                dias_restantes=r['dias_restantes'],
-                fecha_prediccion=datetime.now(),
-                factores_riesgo=r['factores_riesgo']
+            _prediccion_json(id_solicitud, codigo, rol, None, prob, nivel, restantes, ahora, factores)
+            for id_solicitud, codigo, rol, prob, nivel, restantes, factores in zip(
+                resultados['id_solicitud'],
+                resultados['codigo_sla'],
+                resultados['nombre_rol'],
+                resultados['probabilidad_incumplimiento'],
+                resultados['nivel_riesgo'],
+                resultados['dias_restantes'],
+                resultados['factores_riesgo']
             )
-            for r in resultados
         ]
         
         total_paginas = (total + tamano_pagina - 1) // tamano_pagina if total > 0 else 0
         
-        return PrediccionBatchResponse(
-            data=predicciones,
-            pagina=pagina,
-            tamano_pagina=tamano_pagina,
-            total_registros=total,
-            total_paginas=total_paginas
-        )
+        return _json_response({
+            "data": predicciones,
+            "pagina": pagina,
+            "tamano_pagina": tamano_pagina,
+            "total_registros": total,
+            "total_paginas": total_paginas,
+            "next_cursor": _encode_cursor(
+                construir_cursor(solicitudes, tamano_pagina, codigo_sla, cursor_actual, pagina)
+            )
+        })
         
     except Exception as e:
         logger.error(f"Error en predicción paginada: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/resumen", response_model=ResumenPrediccion, tags=["Dashboard"])
-async def obtener_resumen():
+@app.get(
+    "/resumen",
+    response_model=ResumenPrediccion,
+    tags=["Dashboard"],
+    dependencies=_CON_SESION_BD,
+)
+def obtener_resumen():
     """
     Resumen rápido para KPIs del dashboard.
     
@@ -303,59 +480,23 @@ async def obtener_resumen():
     Tiempo de respuesta esperado: < 300ms
     """
     try:
-        # Obtener predicciones críticas para calcular resumen
-        solicitudes = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: get_solicitudes_activas(solo_criticas=True, limite=100)
-        )
-        
-        if not solicitudes:
-            return ResumenPrediccion(
-                total_analizadas=0,
-                criticas=0,
-                altas=0,
-                medias=0,
-                bajas=0,
-                promedio_riesgo=0,
-                en_proceso=0,
-                completadas=0,
-                canceladas=0
-            )
-        
-        # Predicción batch
-        resultados = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: predecir_batch(solicitudes)
-        )
-        
-        # Contar por nivel
-        niveles = {"CRITICO": 0, "ALTO": 0, "MEDIO": 0, "BAJO": 0}
-        estados = {"EN PROCESO": 0, "COMPLETADO": 0, "CANCELADO": 0}
-        suma_prob = 0
-        
-        for r in resultados:
-            niveles[r['nivel_riesgo']] += 1
-            suma_prob += r['probabilidad_incumplimiento']
-            
-            # Contar estados (verificar si existe la clave)
-            estado = r.get('estado', 'EN PROCESO').upper()
-            if estado in estados:
-                estados[estado] += 1
-            elif estado == 'EN PROCESO' or estado == 'PENDIENTE' or estado == 'ACTIVO':
-                estados['EN PROCESO'] += 1
-        
-        promedio = (suma_prob / len(resultados) * 100) if resultados else 0
+        # Combinaciones de features de las críticas, agrupadas en la BD
+        grupos = get_resumen_criticas(limite=100)
+        resumen = resumir_predicciones(grupos)
+        niveles = resumen["por_nivel"]
+        total = resumen["total"]
         
+        # Las críticas salen de solicitudes EN_PROCESO_*, todas cuentan como en proceso
         return ResumenPrediccion(
-            total_analizadas=len(resultados),
+            total_analizadas=total,
             criticas=niveles["CRITICO"],
             altas=niveles["ALTO"],
             medias=niveles["MEDIO"],
             bajas=niveles["BAJO"],
-            promedio_riesgo=round(promedio, 1),
-            en_proceso=estados["EN PROCESO"],
-            completadas=estados["COMPLETADO"],
-            canceladas=estados["CANCELADO"]
+            promedio_riesgo=round(resumen["promedio"], 1),
+            en_proceso=total,
+            completadas=0,
+            canceladas=0
         )
         
     except Exception as e:
@@ -363,8 +504,13 @@ async def obtener_resumen():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/tendencias", response_model=List[TendenciaItem], tags=["Dashboard"])
-async def obtener_tendencias(
+@app.get(
+    "/tendencias",
+    response_model=List[TendenciaItem],
+    tags=["Dashboard"],
+    dependencies=_CON_SESION_BD,
+)
+def obtener_tendencias(
     meses: int = Query(default=6, ge=1, le=24, description="Meses hacia atrás")
 ):
     """
@@ -373,28 +519,40 @@ async def obtener_tendencias(
     Útil para gráficos de evolución temporal.
     """
     try:
-        tendencias = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: get_tendencias_historicas(meses)
-        )
-        
-        return [
-            TendenciaItem(
-                periodo=t['periodo'],
-                total_solicitudes=t['total_solicitudes'],
-                incumplidas=t['incumplidas'],
-                tasa_incumplimiento=float(t['tasa_incumplimiento'] or 0)
-            )
-            for t in tendencias
-        ]
+        with _tendencias_cache_lock:
+            contenido = _tendencias_cache.get(meses)
+        if contenido is None:
+            tendencias = get_tendencias_historicas(meses)
+            
+            # Filas de BD confiables: se construyen sin re-validar cada campo
+            items = [
+                TendenciaItem.model_construct(
+                    periodo=t['periodo'],
+                    total_solicitudes=t['total_solicitudes'],
+                    incumplidas=t['incumplidas'],
+                    tasa_incumplimiento=float(t['tasa_incumplimiento'] or 0)
+                )
+                for t in tendencias
+            ]
+            contenido = orjson.dumps([item.model_dump() for item in items])
+            # Vacío también es lo que devuelve un error de BD: no se cachea
+            if items:
+                with _tendencias_cache_lock:
+                    _tendencias_cache[meses] = contenido
+        return Response(content=contenido, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error al obtener tendencias: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/modelo/reentrenar", response_model=ReentrenamientoResponse, tags=["Admin"])
-async def reentrenar_modelo(
+@app.post(
+    "/modelo/reentrenar",
+    response_model=ReentrenamientoResponse,
+    tags=["Admin"],
+    dependencies=_CON_SESION_BD,
+)
+def reentrenar_modelo(
     fecha_inicio: Optional[str] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
     fecha_fin: Optional[str] = Query(None, description="Fecha final (YYYY-MM-DD)")
 ):
@@ -408,10 +566,7 @@ async def reentrenar_modelo(
     Este endpoint puede tardar varios segundos.
     """
     try:
-        resultado = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            lambda: forzar_reentrenamiento(fecha_inicio, fecha_fin)
-        )
+        resultado = forzar_reentrenamiento(fecha_inicio, fecha_fin)
         
         return ReentrenamientoResponse(
             status="ok",
@@ -433,7 +588,7 @@ async def info_modelo():
 
 
 @app.get("/modelo/importancia", tags=["Admin"])
-async def importancia_variables():
+def importancia_variables():
     """
     Obtiene la importancia de cada variable en el modelo.
     
@@ -448,10 +603,7 @@ async def importancia_variables():
     try:
         from .model import get_feature_importance
         
-        importancia = await asyncio.get_event_loop().run_in_executor(
-            executor,
-            get_feature_importance
-        )
+        importancia = get_feature_importance()
         
         return importancia
         
@@ -2,25 +2,29 @@
 Modelo de Machine Learning para predicción de SLA
 """
 import os
+import copy
 import logging
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 import joblib
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
-from .config import get_settings
+from .config import settings
 from .database import get_datos_entrenamiento
+from .forest import ForestCompacto
+from .kernels import NIVELES_RIESGO, FACTORES_POR_MASCARA, nivel_riesgo_vec, factores_mask_vec
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 # Variables globales para el modelo (singleton)
-_modelo: Optional[Pipeline] = None
+_modelo: Optional[ForestCompacto] = None
 _modelo_timestamp: Optional[float] = None
 _modelo_accuracy: Optional[float] = None
 _modelo_fecha_inicio: Optional[str] = None
@@ -29,6 +33,12 @@ _modelo_registros: Optional[int] = None
 _modelo_fecha_inicio: Optional[str] = None
 _modelo_fecha_fin: Optional[str] = None
 _modelo_registros: Optional[int] = None
+# mtime del .npz del que viene _modelo; si cambia, otro worker lo reemplazó
+_modelo_mtime: Optional[int] = None
+
+# Serializa la carga y el reemplazo de _modelo (carga inicial, recarga
+# periódica y reentrenamiento forzado)
+_modelo_lock = threading.Lock()
 
 
 def calcular_nivel_riesgo(probabilidad: float) -> str:
@@ -79,24 +89,48 @@ def identificar_factores_riesgo(
     return factores
 
 
-def entrenar_modelo(datos: Optional[List[Dict]] = None) -> Tuple[Pipeline, float]:
+# Niveles indexables por código, para traducir un arreglo completo de una vez
+_NIVELES_RIESGO_ARR = np.array(NIVELES_RIESGO)
+
+
+def calcular_nivel_riesgo_vec(probs: np.ndarray) -> np.ndarray:
     """
-    Entrena el modelo de predicción con datos históricos.
+    Versión vectorizada de calcular_nivel_riesgo.
     
     Args:
-        datos: Datos de entrenamiento (opcional, se obtienen de BD si no se proveen)
+        probs: Arreglo de probabilidades entre 0 y 1
     
     Returns:
-        Tupla (modelo entrenado, accuracy)
+        Arreglo de strings con el nivel de riesgo de cada probabilidad
     """
-    logger.info("Iniciando entrenamiento del modelo...")
-    
-    # Obtener datos si no se proveen
-    if datos is None:
-        datos = get_datos_entrenamiento(limite=settings.max_training_samples)
+    return _NIVELES_RIESGO_ARR[nivel_riesgo_vec(probs)]
+
+
+def identificar_factores_riesgo_vec(
+    dt: np.ndarray,
+    du: np.ndarray,
+    probs: np.ndarray
+) -> List[Tuple[str, ...]]:
+    """
+    Versión vectorizada de identificar_factores_riesgo.
     
-    if len(datos) < 50:
-        logger.warning(f"Pocos datos para entrenar ({len(datos)}), usando modelo base")
+    Returns:
+        Factores de riesgo por solicitud: las tuplas inmutables de
+        FACTORES_POR_MASCARA, compartidas entre filas sin copiarlas
+    """
+    mascaras = factores_mask_vec(dt, du, probs).tolist()
+    return [FACTORES_POR_MASCARA[m] for m in mascaras]
+
+
+# Pipeline base para cuando no hay datos suficientes: siempre es el mismo,
+# así que se entrena una sola vez por proceso y se entregan copias
+_pipeline_base: Optional[Pipeline] = None
+
+
+def _get_pipeline_base() -> Pipeline:
+    """Pipeline mínimo entrenado con datos dummy (se construye en el primer uso)"""
+    global _pipeline_base
+    if _pipeline_base is None:
         # Crear modelo con parámetros mínimos
         pipeline = Pipeline([
             ('scaler', StandardScaler()),
@@ -107,17 +141,36 @@ def entrenar_modelo(datos: Optional[List[Dict]] = None) -> Tuple[Pipeline, float
             ))
         ])
         # Datos dummy para inicializar
-        X_dummy = np.array([[1, 5, 1], [2, 5, 1], [3, 5, 1], [4, 5, 1], [5, 5, 1]])
+        X_dummy = np.array([[1, 5, 1], [2, 5, 1], [3, 5, 1], [4, 5, 1], [5, 5, 1]], dtype=np.float32)
         y_dummy = np.array([0, 0, 0, 1, 1])
         pipeline.fit(X_dummy, y_dummy)
-        return pipeline, 0.0
+        _pipeline_base = pipeline
+    return _pipeline_base
+
+
+def entrenar_modelo(datos: Optional[pd.DataFrame] = None) -> Tuple[Pipeline, float]:
+    """
+    Entrena el modelo de predicción con datos históricos.
     
-    # Preparar datos
-    X = np.array([
-        [d['dias_transcurridos'], d['dias_umbral'], d['id_rol']] 
-        for d in datos
-    ])
-    y = np.array([d['incumplio'] for d in datos])
+    Args:
+        datos: Datos de entrenamiento (opcional, se obtienen de BD si no se proveen)
+    
+    Returns:
+        Tupla (modelo entrenado, accuracy)
+    """
+    logger.info("Iniciando entrenamiento del modelo...")
+    
+    # Obtener datos si no se proveen
+    if datos is None:
+        datos = get_datos_entrenamiento(limite=settings.max_training_samples)
+    
+    if len(datos) < 50:
+        logger.warning(f"Pocos datos para entrenar ({len(datos)}), usando modelo base")
+        return copy.deepcopy(_get_pipeline_base()), 0.0
+    
+    # Preparar datos (float32: el árbol de sklearn compara en float32 internamente)
+    X = datos[['dias_transcurridos', 'dias_umbral', 'id_rol']].to_numpy(dtype=np.float32)
+    y = datos['incumplio'].to_numpy()
     
     # Dividir en train/test
     X_train, X_test, y_train, y_test = train_test_split(
@@ -132,7 +185,7 @@ def entrenar_modelo(datos: Optional[List[Dict]] = None) -> Tuple[Pipeline, float
             max_depth=10,
             min_samples_split=5,
             min_samples_leaf=2,
-            n_jobs=-1,  # Usar todos los cores
+            n_jobs=-1,  # Usar todos los cores (solo durante el entrenamiento)
             random_state=42,
             class_weight='balanced'  # Balancear clases
         ))
@@ -150,39 +203,73 @@ def entrenar_modelo(datos: Optional[List[Dict]] = None) -> Tuple[Pipeline, float
     return pipeline, accuracy
 
 
-def get_modelo() -> Pipeline:
+def _ruta_modelo_compacto() -> str:
+    """Archivo .npz del modelo (misma ruta que model_path con otra extensión)"""
+    return os.path.splitext(settings.model_path)[0] + '.npz'
+
+
+def _mtime_modelo() -> Optional[int]:
+    """mtime (ns) del .npz en disco, o None si todavía no existe"""
+    try:
+        return os.stat(_ruta_modelo_compacto()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _guardar_modelo(modelo: ForestCompacto):
+    """Guarda el modelo compacto; los errores se registran sin interrumpir"""
+    ruta = _ruta_modelo_compacto()
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        modelo.guardar(ruta)
+        logger.info(f"Modelo guardado en {ruta}")
+    except Exception as e:
+        logger.error(f"Error al guardar modelo: {e}")
+
+
+def _leer_modelo() -> Optional[ForestCompacto]:
     """
-    Obtiene el modelo de predicción.
-    Carga desde archivo o entrena si es necesario.
-    Implementa patrón singleton con recarga periódica.
+    Lee el modelo compacto; si solo existe el pickle de versiones anteriores
+    (model_path), lo convierte y guarda el .npz para las próximas cargas.
+    """
+    ruta = _ruta_modelo_compacto()
+    if os.path.exists(ruta):
+        logger.info(f"Modelo cargado desde {ruta}")
+        return ForestCompacto.cargar(ruta)
+    
+    if os.path.exists(settings.model_path):
+        modelo = ForestCompacto.desde_pipeline(joblib.load(settings.model_path))
+        logger.info(f"Modelo convertido desde {settings.model_path}")
+        _guardar_modelo(modelo)
+        return modelo
+    
+    return None
+
+
+def _cargar_modelo() -> ForestCompacto:
+    """
+    Carga el modelo desde archivo o entrena uno nuevo si no existe.
+    Debe llamarse con _modelo_lock tomado.
     
     Returns:
         Modelo entrenado listo para predicciones
     """
-    global _modelo, _modelo_timestamp, _modelo_accuracy, _modelo_fecha_inicio, _modelo_fecha_fin, _modelo_registros
+    global _modelo, _modelo_timestamp, _modelo_accuracy, _modelo_fecha_inicio, _modelo_fecha_fin, _modelo_registros, _modelo_mtime
     
     now = datetime.now().timestamp()
     
-    # Verificar si necesita recargar
-    necesita_recargar = (
-        _modelo is None or
-        _modelo_timestamp is None or
-        (now - _modelo_timestamp) > settings.model_reload_interval
-    )
-    
-    if not necesita_recargar:
-        return _modelo
-    
-    model_path = settings.model_path
-    
     # Intentar cargar modelo existente
-    if os.path.exists(model_path):
-        try:
-            _modelo = joblib.load(model_path)
+    try:
+        # mtime antes de leer: si el archivo cambia en medio, el próximo chequeo lo recarga
+        mtime = _mtime_modelo()
+        modelo = _leer_modelo()
+        if modelo is not None:
+            _modelo = modelo
             _modelo_timestamp = now
+            _modelo_mtime = mtime if mtime is not None else _mtime_modelo()
             
             # Cargar metadatos si existen
-            metadata_path = model_path.replace('.pkl', '_metadata.pkl')
+            metadata_path = settings.model_path.replace('.pkl', '_metadata.pkl')
             if os.path.exists(metadata_path):
                 metadata = joblib.load(metadata_path)
                 _modelo_fecha_inicio = metadata.get('fecha_inicio')
@@ -191,27 +278,74 @@ def get_modelo() -> Pipeline:
                 _modelo_accuracy = metadata.get('accuracy')
                 logger.info(f"Metadatos cargados: {metadata}")
             
-            logger.info(f"Modelo cargado desde {model_path}")
             return _modelo
-        except Exception as e:
-            logger.warning(f"Error al cargar modelo: {e}, entrenando nuevo...")
+    except Exception as e:
+        logger.warning(f"Error al cargar modelo: {e}, entrenando nuevo...")
     
     # Entrenar nuevo modelo
-    _modelo, _modelo_accuracy = entrenar_modelo()
+    pipeline, _modelo_accuracy = entrenar_modelo()
+    _modelo = ForestCompacto.desde_pipeline(pipeline)
     _modelo_timestamp = now
     _modelo_registros = None
     
-    # Guardar modelo
-    try:
-        os.makedirs(os.path.dirname(model_path), exist_ok=True)
-        joblib.dump(_modelo, model_path)
-        logger.info(f"Modelo guardado en {model_path}")
-    except Exception as e:
-        logger.error(f"Error al guardar modelo: {e}")
+    _guardar_modelo(_modelo)
+    _modelo_mtime = _mtime_modelo()
     
     return _modelo
 
 
+def get_modelo() -> ForestCompacto:
+    """
+    Obtiene el modelo de predicción.
+    Implementa patrón singleton: solo la primera llamada carga o entrena.
+    La recarga periódica la hace recargar_modelo desde una tarea de fondo,
+    así el camino caliente de predicción es una sola lectura de variable global.
+    
+    Returns:
+        Modelo entrenado listo para predicciones
+    """
+    modelo = _modelo
+    if modelo is not None:
+        return modelo
+    
+    with _modelo_lock:
+        if _modelo is None:
+            return _cargar_modelo()
+        return _modelo
+
+
+def recargar_modelo() -> ForestCompacto:
+    """
+    Recarga el modelo desde archivo (o lo entrena si no existe).
+    Se invoca cada model_reload_interval segundos desde el lifespan de la app.
+    
+    Returns:
+        Modelo recargado
+    """
+    with _modelo_lock:
+        return _cargar_modelo()
+
+
+def recargar_si_cambio() -> bool:
+    """
+    Recarga el modelo si el .npz en disco no es el que está en memoria, por
+    ejemplo porque otro worker lo reentrenó. Es solo un stat del archivo, así
+    que se puede llamar cada pocos segundos.
+    
+    Returns:
+        True si el modelo se recargó
+    """
+    mtime = _mtime_modelo()
+    if mtime is None or mtime == _modelo_mtime:
+        return False
+    
+    with _modelo_lock:
+        if _mtime_modelo() == _modelo_mtime:
+            return False
+        _cargar_modelo()
+        return True
+
+
 def predecir(
     dias_transcurridos: float,
     dias_umbral: float,
@@ -230,11 +364,10 @@ def predecir(
     """
     modelo = get_modelo()
     
-    X = np.array([[dias_transcurridos, dias_umbral, id_rol]])
+    X = np.array([[dias_transcurridos, dias_umbral, id_rol]], dtype=np.float32)
     
     # Obtener probabilidad de incumplimiento (clase 1)
-    probabilidades = modelo.predict_proba(X)
-    probabilidad = float(probabilidades[0][1]) if probabilidades.shape[1] > 1 else float(probabilidades[0][0])
+    probabilidad = float(modelo.predecir_probabilidad(X)[0])
     
     nivel_riesgo = calcular_nivel_riesgo(probabilidad)
     factores = identificar_factores_riesgo(dias_transcurridos, dias_umbral, probabilidad)
@@ -242,56 +375,86 @@ def predecir(
     return probabilidad, nivel_riesgo, factores
 
 
-def predecir_batch(solicitudes: List[Dict]) -> List[Dict]:
+def predecir_varios(X: np.ndarray) -> List[Tuple[float, str, Tuple[str, ...]]]:
+    """
+    Predicciones individuales agrupadas en una sola evaluación del modelo.
+    
+    Args:
+        X: Matriz float32 (n, 3) con dias_transcurridos, dias_umbral, id_rol
+    
+    Returns:
+        Una tupla (probabilidad, nivel_riesgo, factores) por fila, como predecir
+    """
+    modelo = get_modelo()
+    
+    probs = modelo.predecir_probabilidad(X)
+    
+    niveles = calcular_nivel_riesgo_vec(probs).tolist()
+    factores = identificar_factores_riesgo_vec(X[:, 0], X[:, 1], probs)
+    
+    return list(zip(probs.tolist(), niveles, factores))
+
+
+def predecir_batch(solicitudes: Dict[str, Sequence]) -> Dict[str, Sequence]:
     """
     Realiza predicciones en batch (más eficiente).
     
     Args:
-        solicitudes: Lista de solicitudes con dias_transcurridos, dias_umbral, id_rol
+        solicitudes: Lote columnar de get_solicitudes_activas; usa la matriz
+            de features 'X' (dias_transcurridos, dias_umbral, id_rol)
     
     Returns:
-        Lista de resultados con probabilidad y nivel de riesgo
+        El mismo lote más las columnas probabilidad_incumplimiento,
+        nivel_riesgo y factores_riesgo (una entrada por solicitud)
     """
     if not solicitudes:
-        return []
+        return {}
     
     modelo = get_modelo()
     
-    # Preparar datos
-    X = np.array([
-        [s['dias_transcurridos'], s['dias_umbral'], s['id_rol']] 
-        for s in solicitudes
-    ])
+    # Predicción batch directo sobre la matriz del lote
+    X = solicitudes['X']
+    probs = modelo.predecir_probabilidad(X)
     
-    # Predicción batch
-    probabilidades = modelo.predict_proba(X)
-    probs = probabilidades[:, 1] if probabilidades.shape[1] > 1 else probabilidades[:, 0]
-    
-    # Construir resultados
-    resultados = []
-    for i, (sol, prob) in enumerate(zip(solicitudes, probs)):
-        prob_float = float(prob)
-        # Debug: Ver qué campos tiene la primera solicitud
-        if i == 0:
-            logger.info(f"🔍 DEBUG - Campos de solicitud: {list(sol.keys())}")
-            logger.info(f"🔍 DEBUG - estado_cumplimiento: {sol.get('estado_cumplimiento')}")
-        
-        resultados.append({
-            'id_solicitud': sol['id_solicitud'],
-            'codigo_sla': sol.get('codigo_sla'),
-            'nombre_rol': sol.get('nombre_rol'),
-            'estado_cumplimiento': sol.get('estado_cumplimiento'),  # Estado SLA
-            'probabilidad_incumplimiento': round(prob_float, 4),
-            'nivel_riesgo': calcular_nivel_riesgo(prob_float),
-            'dias_restantes': sol.get('dias_restantes'),
-            'factores_riesgo': identificar_factores_riesgo(
-                sol['dias_transcurridos'],
-                sol['dias_umbral'],
-                prob_float
-            )
-        })
-    
-    return resultados
+    logger.debug(f"Columnas del lote: {list(solicitudes.keys())}")
+    
+    # Post-proceso vectorizado sobre el batch completo
+    return {
+        **solicitudes,
+        'probabilidad_incumplimiento': np.round(probs, 4).tolist(),
+        'nivel_riesgo': calcular_nivel_riesgo_vec(probs).tolist(),
+        'factores_riesgo': identificar_factores_riesgo_vec(X[:, 0], X[:, 1], probs)
+    }
+
+
+def resumir_predicciones(grupos: Dict[str, np.ndarray]) -> Dict:
+    """
+    Agrega las predicciones de solicitudes agrupadas por features.
+    
+    Args:
+        grupos: Resultado de get_resumen_criticas ('X' y 'cantidad')
+    
+    Returns:
+        Diccionario con total, conteo por nivel de riesgo y probabilidad promedio (%)
+    """
+    if not grupos:
+        return {"total": 0, "por_nivel": dict.fromkeys(NIVELES_RIESGO, 0), "promedio": 0.0}
+    
+    modelo = get_modelo()
+    
+    probs = modelo.predecir_probabilidad(grupos['X'])
+    cantidad = grupos['cantidad']
+    total = int(cantidad.sum())
+    
+    por_nivel = np.bincount(nivel_riesgo_vec(probs), weights=cantidad, minlength=len(NIVELES_RIESGO))
+    # Mismo redondeo que las predicciones individuales antes de promediar
+    promedio = float((np.round(probs, 4) * cantidad).sum() / total * 100)
+    
+    return {
+        "total": total,
+        "por_nivel": {nivel: int(n) for nivel, n in zip(NIVELES_RIESGO, por_nivel)},
+        "promedio": promedio
+    }
 
 
 def forzar_reentrenamiento(fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> Dict:
@@ -305,7 +468,7 @@ def forzar_reentrenamiento(fecha_inicio: Optional[str] = None, fecha_fin: Option
     Returns:
         Información del reentrenamiento
     """
-    global _modelo, _modelo_timestamp, _modelo_accuracy, _modelo_fecha_inicio, _modelo_fecha_fin, _modelo_registros
+    global _modelo, _modelo_timestamp, _modelo_accuracy, _modelo_fecha_inicio, _modelo_fecha_fin, _modelo_registros, _modelo_mtime
     
     # Obtener datos con o sin rango de fechas
     datos = get_datos_entrenamiento(
@@ -314,33 +477,43 @@ def forzar_reentrenamiento(fecha_inicio: Optional[str] = None, fecha_fin: Option
         fecha_fin=fecha_fin
     )
     
-    _modelo, _modelo_accuracy = entrenar_modelo(datos)
-    _modelo_timestamp = datetime.now().timestamp()
-    _modelo_fecha_inicio = fecha_inicio
-    _modelo_fecha_fin = fecha_fin
-    _modelo_registros = len(datos)
-    
-    # Guardar modelo y metadatos
-    try:
-        os.makedirs(os.path.dirname(settings.model_path), exist_ok=True)
-        
-        # Guardar modelo
-        joblib.dump(_modelo, settings.model_path)
-        
-        # Guardar metadatos
-        metadata = {
-            'fecha_inicio': fecha_inicio,
-            'fecha_fin': fecha_fin,
-            'registros': len(datos),
-            'accuracy': _modelo_accuracy,
-            'timestamp': datetime.now().isoformat()
-        }
-        metadata_path = settings.model_path.replace('.pkl', '_metadata.pkl')
-        joblib.dump(metadata, metadata_path)
+    # Entrenar fuera del lock: las predicciones siguen con el modelo actual
+    pipeline, accuracy = entrenar_modelo(datos)
+    nuevo = ForestCompacto.desde_pipeline(pipeline)
+    
+    # Reemplazo y guardado bajo el lock, para que una recarga concurrente no
+    # lea el archivo anterior y pise el modelo recién entrenado
+    with _modelo_lock:
+        _modelo = nuevo
+        _modelo_accuracy = accuracy
+        _modelo_timestamp = datetime.now().timestamp()
+        _modelo_fecha_inicio = fecha_inicio
+        _modelo_fecha_fin = fecha_fin
+        _modelo_registros = len(datos)
         
-        logger.info(f"Modelo guardado con metadatos: {metadata}")
-    except Exception as e:
-        logger.error(f"Error al guardar modelo: {e}")
+        # Guardar metadatos y modelo. Los metadatos van primero: el cambio del
+        # .npz es lo que hace recargar a los otros workers
+        try:
+            os.makedirs(os.path.dirname(settings.model_path), exist_ok=True)
+            
+            # Guardar metadatos
+            metadata = {
+                'fecha_inicio': fecha_inicio,
+                'fecha_fin': fecha_fin,
+                'registros': len(datos),
+                'accuracy': _modelo_accuracy,
+                'timestamp': datetime.now().isoformat()
+            }
+            metadata_path = settings.model_path.replace('.pkl', '_metadata.pkl')
+            joblib.dump(metadata, metadata_path)
+            
+            # Guardar modelo
+            _modelo.guardar(_ruta_modelo_compacto())
+            _modelo_mtime = _mtime_modelo()
+            
+            logger.info(f"Modelo guardado con metadatos: {metadata}")
+        except Exception as e:
+            logger.error(f"Error al guardar modelo: {e}")
     
     return {
         "samples_used": len(datos),
@@ -362,7 +535,7 @@ def get_modelo_info() -> Dict:
         "loaded": _modelo is not None,
         "timestamp": datetime.fromtimestamp(_modelo_timestamp) if _modelo_timestamp else None,
         "accuracy": _modelo_accuracy,
-        "path": settings.model_path,
+        "path": _ruta_modelo_compacto(),
         "fecha_inicio": _modelo_fecha_inicio,
         "fecha_fin": _modelo_fecha_fin,
         "registros": _modelo_registros
@@ -378,7 +551,7 @@ def get_feature_importance() -> Dict:
     """
     modelo = get_modelo()
     
-    if not modelo or not hasattr(modelo.named_steps.get('classifier'), 'feature_importances_'):
+    if not modelo or getattr(modelo, 'feature_importances_', None) is None:
         return {
             "error": "Modelo no disponible o no soporta feature importance",
             "feature_names": [],
@@ -396,7 +569,7 @@ def get_feature_importance() -> Dict:
     }
     
     # Obtener importancias del clasificador
-    importances = modelo.named_steps['classifier'].feature_importances_
+    importances = modelo.feature_importances_
     
     # Crear lista ordenada por importancia (mayor a menor)
     features_data = [
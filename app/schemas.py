@@ -2,7 +2,7 @@
 Schemas/DTOs para el servicio de predicción
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 
@@ -24,7 +24,8 @@ class PrediccionResponse(BaseModel):
     nivel_riesgo: str = Field(..., pattern="^(CRITICO|ALTO|MEDIO|BAJO)$")
     dias_restantes: Optional[int] = None
     fecha_prediccion: datetime
-    factores_riesgo: Optional[List[str]] = None
+    # Tupla: en batch, las filas con los mismos factores comparten el valor
+    factores_riesgo: Optional[Tuple[str, ...]] = None
 
     class Config:
         json_schema_extra = {
@@ -48,6 +49,7 @@ class PrediccionBatchResponse(BaseModel):
     tamano_pagina: int = Field(..., ge=1, le=100)
     total_registros: int = Field(..., ge=0)
     total_paginas: int = Field(..., ge=0)
+    next_cursor: Optional[str] = Field(default=None, description="Cursor opaco para pedir la página siguiente")
 
 
 class ResumenPrediccion(BaseModel):
@@ -0,0 +1,22 @@
+-- Índice para la paginación por keyset (seek) de /predecir/paginado
+-- Permite continuar desde la última fila (fecha_solicitud, id_solicitud) con un
+-- index seek en lugar de recorrer y descartar filas con OFFSET.
+-- Ejecutar en SQL Server Management Studio sobre Proyecto1SLA_DB
+
+USE [Proyecto1SLA_DB];
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE name = 'IX_solicitud_fecha_id' AND object_id = OBJECT_ID('dbo.solicitud')
+)
+BEGIN
+    CREATE INDEX IX_solicitud_fecha_id
+        ON dbo.solicitud (fecha_solicitud, id_solicitud);
+    PRINT 'Índice IX_solicitud_fecha_id creado';
+END
+ELSE
+BEGIN
+    PRINT 'Índice IX_solicitud_fecha_id ya existe';
+END
+GO
@@ -0,0 +1,46 @@
+-- Columna calculada persistida con la clasificación de incumplimiento
+-- Evita evaluar CASE WHEN estado_cumplimiento_sla LIKE 'NO_CUMPLE%' por fila en
+-- el entrenamiento y en las estadísticas (tendencias, por rol, por SLA).
+-- Ejecutar en SQL Server Management Studio sobre Proyecto1SLA_DB
+
+USE [Proyecto1SLA_DB];
+GO
+
+-- Requerido para indexar columnas calculadas
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF COL_LENGTH('dbo.solicitud', 'incumplio') IS NULL
+BEGIN
+    ALTER TABLE dbo.solicitud
+        ADD incumplio AS (
+            CASE WHEN estado_cumplimiento_sla LIKE 'NO_CUMPLE%' THEN 1 ELSE 0 END
+        ) PERSISTED;
+    PRINT 'Columna solicitud.incumplio creada';
+END
+ELSE
+BEGIN
+    PRINT 'Columna solicitud.incumplio ya existe';
+END
+GO
+
+-- Índice para las agregaciones por fecha sobre solicitudes finalizadas.
+-- SQL Server no admite LIKE ni columnas calculadas en el filtro de un índice
+-- filtrado, así que estado_cumplimiento_sla va en INCLUDE y el NOT LIKE
+-- 'EN_PROCESO%' se evalúa sobre el propio índice, sin lookups a la tabla.
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE name = 'IX_solicitud_incumplio_fecha' AND object_id = OBJECT_ID('dbo.solicitud')
+)
+BEGIN
+    CREATE INDEX IX_solicitud_incumplio_fecha
+        ON dbo.solicitud (fecha_solicitud)
+        INCLUDE (incumplio, estado_cumplimiento_sla, id_rol_registro, id_sla, num_dias_sla);
+    PRINT 'Índice IX_solicitud_incumplio_fecha creado';
+END
+ELSE
+BEGIN
+    PRINT 'Índice IX_solicitud_incumplio_fecha ya existe';
+END
+GO
@@ -0,0 +1,49 @@
+-- Índices de cobertura para get_solicitudes_activas
+-- Con ellos el join solicitud -> config_sla se resuelve solo con índices,
+-- sin key lookups a la tabla solicitud.
+-- Ejecutar en SQL Server Management Studio sobre Proyecto1SLA_DB
+
+USE [Proyecto1SLA_DB];
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE name = 'IX_sol_active' AND object_id = OBJECT_ID('dbo.solicitud')
+)
+BEGIN
+    CREATE INDEX IX_sol_active
+        ON dbo.solicitud (id_sla, estado_solicitud, fecha_solicitud)
+        INCLUDE (id_rol_registro, estado_cumplimiento_sla, num_dias_sla, id_solicitud);
+    PRINT 'Índice IX_sol_active creado';
+END
+ELSE
+BEGIN
+    PRINT 'Índice IX_sol_active ya existe';
+END
+GO
+
+IF NOT EXISTS (
+    SELECT * FROM sys.indexes
+    WHERE name = 'IX_config_sla_active' AND object_id = OBJECT_ID('dbo.config_sla')
+)
+BEGIN
+    CREATE INDEX IX_config_sla_active
+        ON dbo.config_sla (es_activo, codigo_sla)
+        INCLUDE (id_sla, dias_umbral, descripcion, tipo_solicitud);
+    PRINT 'Índice IX_config_sla_active creado';
+END
+ELSE
+BEGIN
+    PRINT 'Índice IX_config_sla_active ya existe';
+END
+GO
+
+-- Verificación: el plan debe usar IX_sol_active y reportar 0 lookups en solicitud
+-- SET STATISTICS IO ON;
+-- SELECT s.id_solicitud, s.fecha_solicitud, s.id_rol_registro, s.estado_cumplimiento_sla
+-- FROM solicitud s
+-- INNER JOIN config_sla c ON s.id_sla = c.id_sla
+-- WHERE c.es_activo = 1
+--     AND s.estado_cumplimiento_sla LIKE 'EN_PROCESO_%'
+--     AND s.estado_solicitud NOT IN ('COMPLETADA', 'CANCELADA');
+-- SET STATISTICS IO OFF;
@@ -0,0 +1,113 @@
+"""
+Verifica que ForestCompacto reproduzca exactamente a predict_proba del
+pipeline de sklearn del que se convierte.
+
+Uso: python test_forest.py   (o pytest test_forest.py)
+"""
+import os
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
+
+from app.forest import ForestCompacto
+
+
+def _pipeline(n_estimators: int = 100, max_depth: int = 10) -> Pipeline:
+    """Mismos hiperparámetros que model.entrenar_modelo"""
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('classifier', RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            random_state=42
+        ))
+    ])
+
+
+def _datos(n: int, incumplimientos: int = None, seed: int = 0):
+    """Solicitudes sintéticas (dias_transcurridos, dias_umbral, id_rol)"""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(0, 60, n),
+        rng.integers(1, 30, n),
+        rng.integers(1, 6, n),
+    ]).astype(np.float32)
+    if incumplimientos is None:
+        y = (X[:, 0] > X[:, 1] * 0.8 + rng.normal(0, 3, n)).astype(int)
+    else:
+        y = np.zeros(n, dtype=int)
+        y[rng.choice(n, incumplimientos, replace=False)] = 1
+    return X, y
+
+
+def _entradas(seed: int = 1) -> np.ndarray:
+    """Incluye días fuera del rango de entrenamiento y valores justo en los umbrales"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, 600, 3000),
+        rng.integers(0, 40, 3000),
+        rng.integers(1, 6, 3000),
+    ]).astype(np.float32)
+
+
+def _probabilidad_sklearn(pipeline: Pipeline, X: np.ndarray) -> np.ndarray:
+    """Clase 1 si existe; con una sola clase, la única (como predecir_batch)"""
+    probabilidades = pipeline.predict_proba(X)
+    return probabilidades[:, 1] if probabilidades.shape[1] > 1 else probabilidades[:, 0]
+
+
+def _comparar(pipeline: Pipeline):
+    X = _entradas()
+    compacto = ForestCompacto.desde_pipeline(pipeline)
+    diferencia = np.abs(compacto.predecir_probabilidad(X) - _probabilidad_sklearn(pipeline, X))
+    assert diferencia.max() == 0.0, f"diferencia máxima {diferencia.max()}"
+    return compacto
+
+
+def test_forest_coincide_con_sklearn():
+    X, y = _datos(5000)
+    _comparar(_pipeline().fit(X, y))
+
+
+def test_arboles_de_una_sola_hoja():
+    # Con 2 incumplimientos en 60 filas varios bootstraps salen de una sola clase
+    X, y = _datos(60, incumplimientos=2)
+    pipeline = _pipeline().fit(X, y)
+    hojas = sum(e.tree_.node_count == 1 for e in pipeline.named_steps['classifier'].estimators_)
+    assert hojas > 0
+    _comparar(pipeline)
+
+
+def test_datos_de_una_sola_clase():
+    X, _ = _datos(60)
+    _comparar(_pipeline().fit(X, np.zeros(len(X), dtype=int)))
+
+
+def test_modelo_base():
+    # Pipeline de model.entrenar_modelo cuando hay menos de 50 registros
+    X = np.array([[1, 5, 1], [2, 5, 1], [3, 5, 1], [4, 5, 1], [5, 5, 1]], dtype=np.float32)
+    y = np.array([0, 0, 0, 1, 1])
+    _comparar(_pipeline(n_estimators=10, max_depth=5).fit(X, y))
+
+
+def test_guardar_y_cargar():
+    X, y = _datos(500)
+    compacto = _comparar(_pipeline().fit(X, y))
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "sla_model.npz")
+        compacto.guardar(ruta)
+        assert os.listdir(directorio) == ["sla_model.npz"]
+        cargado = ForestCompacto.cargar(ruta)
+    X = _entradas()
+    assert np.array_equal(cargado.predecir_probabilidad(X), compacto.predecir_probabilidad(X))
+
+
+if __name__ == "__main__":
+    print("\n===== PROBANDO ForestCompacto vs sklearn =====\n")
+    for nombre, prueba in list(globals().items()):
+        if nombre.startswith("test_"):
+            prueba()
+            print(f"  OK  {nombre}")
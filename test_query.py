@@ -5,18 +5,19 @@ print("\n===== PROBANDO get_solicitudes_activas =====\n")
 # Probar con solo_criticas=False y limite=120
 result = get_solicitudes_activas(solo_criticas=False, limite=120)
 
-print(f"Resultado: {len(result)} registros")
+print(f"Resultado: {len(result.get('id_solicitud', ()))} registros")
 
 if result:
     # Agrupar por SLA
     from collections import Counter
-    slas = Counter([r['codigo_sla'] for r in result])
+    slas = Counter(result['codigo_sla'])
     print("\nDistribución por SLA:")
     for sla, count in sorted(slas.items()):
         print(f"  {sla}: {count} registros")
     
     print(f"\nPrimeros 5 registros:")
-    for r in result[:5]:
-        print(f"  ID: {r['id_solicitud']} | SLA: {r['codigo_sla']} | Estado: {r['estado_cumplimiento']} | Días restantes: {r['dias_restantes']}")
+    columnas = ('id_solicitud', 'codigo_sla', 'estado_cumplimiento', 'dias_restantes')
+    for id_solicitud, sla, estado, restantes in list(zip(*(result[c] for c in columnas)))[:5]:
+        print(f"  ID: {id_solicitud} | SLA: {sla} | Estado: {estado} | Días restantes: {restantes}")
 else:
     print("ERROR: No se devolvieron registros")